@@ -0,0 +1,63 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+"""
+Measures the memory allocated per registered argument, for the most common argument kinds.
+
+Usage (from the repository root): python -m benchmarks.argument_memory_benchmark
+"""
+
+import gc
+import tracemalloc
+
+from telegram_click.argument import Argument, Flag
+
+COUNT = 10000
+
+KINDS = {
+    "str": lambda i: Argument(name="arg{}".format(i), description="description", example="text"),
+    "int": lambda i: Argument(name="arg{}".format(i), description="description", type=int, example="1"),
+    "float": lambda i: Argument(name="arg{}".format(i), description="description", type=float, example="1.5"),
+    "flag": lambda i: Flag(name="flag{}".format(i), description="description"),
+}
+
+
+def _bytes_per_argument(factory: callable) -> float:
+    # create the names upfront, so they are not accounted to the arguments
+    names = list(range(COUNT))
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    arguments = list(map(factory, names))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # the list holding the arguments is not part of their cost
+    list_size = arguments.__sizeof__()
+    return (after - before - list_size) / len(arguments)
+
+
+def main():
+    print("{:<8}{:>16}".format("kind", "bytes/argument"))
+    for name, factory in KINDS.items():
+        print("{:<8}{:>16.1f}".format(name, _bytes_per_argument(factory)))
+
+
+if __name__ == '__main__':
+    main()
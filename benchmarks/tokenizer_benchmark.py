@@ -0,0 +1,59 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+"""
+Measures the per-character cost of the argument tokenizer for growing message sizes.
+
+Usage (from the repository root): python -m benchmarks.tokenizer_benchmark
+"""
+
+import timeit
+
+from telegram_click.parser import tokenize
+
+# the maximum length of a telegram text message
+MAX_MESSAGE_LENGTH = 4096
+
+SAMPLES = {
+    "words": "lorem ipsum dolor sit amet ",
+    "long token": "x",
+    "quoted": "\"quoted text with \\\"escaped\\\" quotes\" ",
+}
+
+
+def _build_text(sample: str, length: int) -> str:
+    # only repeat whole samples to keep quotes balanced
+    repeats = max(1, length // len(sample))
+    return sample * repeats
+
+
+def main():
+    sizes = [256, 512, 1024, 2048, MAX_MESSAGE_LENGTH]
+    print("{:<12}{:>8}{:>16}".format("sample", "chars", "ns/char"))
+    for name, sample in SAMPLES.items():
+        for size in sizes:
+            text = _build_text(sample, size)
+            number = 200
+            seconds = min(timeit.repeat(lambda: tokenize(text), number=number, repeat=5))
+            print("{:<12}{:>8}{:>16.2f}".format(name, len(text), seconds / number / len(text) * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+"""
+Measures the per call overhead of the @command wrapper for a command without arguments,
+compared to calling the callback directly.
+
+Usage (from the repository root): python -m benchmarks.wrapper_benchmark
+"""
+
+import asyncio
+import datetime
+import time
+
+import telegram
+from telegram import Update
+from telegram.ext import Application, CallbackContext
+
+from telegram_click.decorator import command
+from telegram_click.registry import CommandRegistry
+
+COUNT = 20000
+
+
+class _Bot:
+    username = "mybot"
+
+
+class _Context(CallbackContext):
+
+    @property
+    def bot(self):
+        return _Bot()
+
+
+async def _callback(update, context):
+    pass
+
+
+def _create_update(text: str) -> Update:
+    user = telegram.User(id=12345678, first_name="Max", is_bot=False)
+    chat = telegram.Chat(id=-12345678, type="private")
+    message = telegram.Message(message_id=1, date=datetime.datetime.now(), chat=chat, from_user=user, text=text)
+    return Update(update_id=1, message=message)
+
+
+async def _run(callback: callable, updates: [Update], context: CallbackContext) -> float:
+    start = time.perf_counter()
+    for update in updates:
+        await callback(update, context)
+    return (time.perf_counter() - start) / len(updates)
+
+
+def main():
+    wrapper = command(name="bench", description="Benchmark", registry=CommandRegistry())(_callback)
+    context = _Context(Application.builder().token("123:abc").build())
+    # a new update for every call, like in a running bot
+    updates = list(map(lambda x: _create_update("/bench"), range(COUNT)))
+
+    direct = asyncio.run(_run(_callback, updates, context))
+    wrapped = asyncio.run(_run(wrapper, updates, context))
+    print("{:<10}{:>12}".format("call", "µs/call"))
+    print("{:<10}{:>12.2f}".format("direct", direct * 1e6))
+    print("{:<10}{:>12.2f}".format("wrapped", wrapped * 1e6))
+    print("{:<10}{:>12.2f}".format("overhead", (wrapped - direct) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
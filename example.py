@@ -21,7 +21,7 @@ import logging
 import os
 
 from telegram import Update
-from telegram.ext import ContextTypes, MessageHandler, CommandHandler, filters, ApplicationBuilder
+from telegram.ext import ContextTypes, filters, ApplicationBuilder
 
 from telegram_click import generate_command_list
 from telegram_click.argument import Argument, Flag
@@ -29,6 +29,7 @@ from telegram_click.decorator import command
 from telegram_click.error_handler import ErrorHandler
 from telegram_click.permission import GROUP_ADMIN, USER_ID, USER_NAME, NOBODY
 from telegram_click.permission.base import Permission
+from telegram_click.router import CommandRouter
 
 logging.getLogger("telegram_click").setLevel(logging.DEBUG)
 
@@ -85,34 +86,19 @@ class MyBot:
         telegram_bot_token = os.environ.get("TELEGRAM_BOT_KEY")
         self._app = ApplicationBuilder().token(telegram_bot_token).build()
 
-        handler_groups = {
-            1: [
-                CommandHandler(['help', 'h'],
-                               filters=(~ filters.FORWARDED) & (~ filters.REPLY),
-                               callback=self._commands_command_callback),
-                CommandHandler('start',
-                               filters=(~ filters.FORWARDED) & (~ filters.REPLY),
-                               callback=self._start_command_callback),
-                CommandHandler('whois',
-                               filters=(~ filters.FORWARDED) & (~ filters.REPLY),
-                               callback=self._whois_command_callback),
-                CommandHandler(['name', 'n'],
-                               filters=(~ filters.FORWARDED) & (~ filters.REPLY),
-                               callback=self._name_command_callback),
-                CommandHandler(['age', 'a'],
-                               filters=(~ filters.FORWARDED) & (~ filters.REPLY),
-                               callback=self._age_command_callback),
-                CommandHandler(['children', 'c'],
-                               filters=(~ filters.FORWARDED) & (~ filters.REPLY),
-                               callback=self._children_command_callback),
-                # Unknown command handler
-                MessageHandler(filters.COMMAND, callback=self._unknown_command_callback)
-            ]
-        }
-
-        for group, handlers in handler_groups.items():
-            for handler in handlers:
-                self._app.add_handler(handler, group=group)
+        # a single handler routes all commands
+        router = CommandRouter(
+            [
+                self._commands_command_callback,
+                self._start_command_callback,
+                self._whois_command_callback,
+                self._name_command_callback,
+                self._age_command_callback,
+                self._children_command_callback,
+            ],
+            unknown_command_callback=self._unknown_command_callback
+        )
+        self._app.add_handler(router.create_handler((~ filters.FORWARDED) & (~ filters.REPLY)), group=1)
 
     def start(self):
         """
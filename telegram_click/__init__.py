@@ -24,11 +24,12 @@ from telegram import Update
 from telegram.ext import ContextTypes
 
 from telegram_click.const import *
+from telegram_click.registry import CommandRegistry
 
 LOGGER = logging.getLogger(__name__)
 
-# global list of all commands
-COMMAND_LIST = []
+# default registry of all commands
+COMMAND_LIST = CommandRegistry()
 
 
 class CommandTarget:
@@ -45,10 +46,14 @@ class CommandTarget:
     ANY = UNSPECIFIED | SELF | OTHER
 
 
-async def generate_command_list(update: Update, context: ContextTypes.DEFAULT_TYPE) -> str:
+async def generate_command_list(update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                registry: CommandRegistry = None) -> str:
     """
+    :param registry: the registry of the commands to list, COMMAND_LIST is used if None
     :return: a Markdown styled text description of all available commands
     """
+    if registry is None:
+        registry = COMMAND_LIST
 
     async def permission_filter(x):
         return x[KEY_PERMISSIONS] is None or await x[KEY_PERMISSIONS].evaluate(update, context)
@@ -60,7 +65,7 @@ async def generate_command_list(update: Update, context: ContextTypes.DEFAULT_TY
     commands_with_permission = []
     commands_not_hidden = []
     result = []
-    for x in COMMAND_LIST:
+    for x in registry:
         if await permission_filter(x):
             commands_with_permission.append(x)
             if await hidden_filter(x):
@@ -69,7 +74,7 @@ async def generate_command_list(update: Update, context: ContextTypes.DEFAULT_TY
     sorted_commands = sorted(commands_not_hidden, key=lambda x: (x[KEY_NAMES][0].lower(), len(x[KEY_ARGUMENTS])))
     help_messages = list(map(lambda x: x[KEY_HELP_MESSAGE], sorted_commands))
 
-    if len(COMMAND_LIST) <= 0:
+    if len(registry) <= 0:
         return "This bot does not have any commands."
 
     if len(commands_not_hidden) <= 0:
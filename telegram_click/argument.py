@@ -18,109 +18,438 @@
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
 
+import asyncio
+import functools
+import inspect
 import logging
+import re
+from array import array
+from concurrent.futures import Executor
+from enum import Enum
 
-from telegram_click.const import ARG_VALUE_SEPARATOR_CHAR
-from telegram_click.util import find_duplicates
+from telegram_click.cache import LRUCache
+from telegram_click.const import ARG_VALUE_SEPARATOR_CHAR, NARGS_ANY, NARGS_AT_LEAST_ONE
+from telegram_click.util import find_duplicates, is_async_callable, PrefixTrie
 
 LOGGER = logging.getLogger(__name__)
 
+# marker for missing converter cache entries, since None is a valid converted value
+_MISSING = object()
+
+
+def _identity_converter(value: str) -> str:
+    """
+    Converts a string to a string
+    :param value: string value
+    :return: the same value
+    """
+    return value
+
+
+def _boolean_converter(value: str) -> bool:
+    """
+    Converts a string to a boolean
+    :param value: string value
+    :return: boolean
+    """
+    s = str(value).lower()
+    if s in ['y', 'yes', 'true', 't', '1']:
+        return True
+    elif s in ['n', 'no', 'false', 'f', '0']:
+        return False
+    else:
+        raise ValueError("Invalid value '{}'".format(value))
+
+
+def _float_converter(value: str) -> float:
+    """
+    Converts a string to a float
+    :param value: string value
+    :return: float
+    """
+    if '%' == value[-1]:
+        return float(value[:-1]) / 100.0
+    else:
+        return float(value)
+
+
+@functools.lru_cache(maxsize=None)
+def _enum_converter(enum_type: type) -> callable:
+    """
+    Creates a converter for the members of an Enum type, shared by all arguments of this type
+    :param enum_type: the Enum type
+    :return: converter function
+    """
+    # map lowercase member name or value -> member, names take precedence over values
+    members = {}
+    for member in enum_type:
+        members[str(member.value).lower()] = member
+    for member_name, member in enum_type.__members__.items():
+        members[member_name.lower()] = member
+
+    def converter(value: str) -> Enum:
+        member = members.get(value.lower())
+        if member is None:
+            raise ValueError("Invalid value '{}'".format(value))
+        return member
+
+    return converter
+
+
+# built-in converters by type, shared by all arguments
+def _convert_all(converter: callable, values: [str]) -> list:
+    """
+    Converts multiple values with a single call, used to run a converter on an executor
+    without having to pass (and pickle) the whole argument
+    :param converter: the converter function
+    :param values: the string values
+    :return: list of converted values
+    """
+    return list(map(converter, values))
+
+
+_BUILTIN_CONVERTERS = {
+    str: _identity_converter,
+    bool: _boolean_converter,
+    int: int,
+    float: _float_converter,
+}
+
 
 class Argument:
     """
-    Command argument description
+    Command argument description.
+    Arguments are immutable once created.
     """
+    __slots__ = ("names", "description", "example", "flag", "type", "builtin_converter", "converter", "optional",
+                 "default", "validator", "nargs", "constraints", "pure", "executor", "converter_cache",
+                 "async_converter", "is_async")
+
+    # whether the argument takes the untokenized rest of the message, see Remainder
+    remainder = False
 
     def __init__(self, name: str or [str], description: str, example: str, type: type = str, converter: callable = None,
-                 flag: bool = False, optional: bool = False, default: any = None, validator: callable = None):
+                 flag: bool = False, optional: bool = False, default: any = None, validator: callable = None,
+                 pure: bool = None, executor: Executor = None, cache_size: int = None, cache_ttl: float = None,
+                 nargs: int or str = None, min: any = None, max: any = None, min_len: int = None, max_len: int = None,
+                 pattern: str or re.Pattern = None):
         """
         Creates a command argument object
         :param name: the name (or names) of the argument
         :param description: a short description of the argument
         :param example: an example (string!) value for this argument
-        :param type: the expected type of the argument
+        :param type: the expected type of the argument, Enum types are supported without a converter
+                     (matching member names and values case-insensitively)
         :param converter: a converter function to convert the string value to the expected type
         :param flag: whether this argument should be treated as a flag
         :param optional: specifies if this argument is optional
         :param default: an optional default value
         :param validator: a validator function
+        :param pure: whether converter and validator always return the same result for the same input,
+                     without side effects (defaults to True only for built-in converters without a validator)
+        :param executor: an optional executor (f.ex. a ThreadPoolExecutor) to run a CPU heavy converter on,
+                         instead of blocking the event loop (a ProcessPoolExecutor requires a picklable converter)
+        :param cache_size: if set, the results of the converter are cached for up to this many distinct input values
+        :param cache_ttl: optional time (in seconds) after which a cached converter result expires
+        :param nargs: makes this a variadic argument, taking an exact number of values, "*" for any number of values
+                      or "+" for at least one value. Values of built-in int and float types are converted
+                      into an array.array, others into a list. The validator is called once with all values.
+        :param min: the minimum (converted) value (of each value of a variadic argument)
+        :param max: the maximum (converted) value (of each value of a variadic argument)
+        :param min_len: the minimum length of the converted value (the number of values of a variadic argument)
+        :param max_len: the maximum length of the converted value (the number of values of a variadic argument)
+        :param pattern: a regular expression the whole string value (each string value of a variadic argument)
+                        has to match
+
+        Constraints (min, max, min_len, max_len and pattern) are checked before the validator
+        and shown in the help message.
+
+        Both the converter and the validator may be async functions,
+        async arguments of the same command are evaluated concurrently.
         """
         for c in name:
             if c.isspace():
                 raise ValueError("Argument name must not contain whitespace!")
-        self.names = [name.strip()] if not isinstance(name, list) else name
-        self.names = list(map(lambda x: x.strip(), self.names))
+        names = [name] if not isinstance(name, list) else name
+        self._set(names=tuple(map(lambda x: x.strip(), names)))
         self._validate_names()
 
-        self.description = description.strip()
-        self.example = example
-        self.flag = flag
-        self.type = bool if flag else type
+        type = bool if flag else type
         if converter is None:
-            if self.type is str:
-                self.converter = lambda x: x
-            elif self.type is bool:
-                self.converter = self._boolean_converter
-            elif self.type is int:
-                self.converter = lambda x: int(x)
-            elif self.type is float:
-                self.converter = self._float_converter
+            builtin = _BUILTIN_CONVERTERS.get(type)
+            if builtin is not None:
+                converter = builtin
+            elif inspect.isclass(type) and issubclass(type, Enum):
+                converter = _enum_converter(type)
             else:
                 raise ValueError("If you want to use a custom type, you have to provide a converter function too!")
+            builtin_converter = True
         else:
-            self.converter = converter
-        self.optional = optional
-        self.default = default
-        self.validator = validator
+            builtin_converter = False
+
+        if nargs is not None and nargs not in [NARGS_ANY, NARGS_AT_LEAST_ONE] and (
+                isinstance(nargs, bool) or not isinstance(nargs, int) or nargs <= 0):
+            raise ValueError("nargs must be a positive number, '{}' or '{}': {}".format(
+                NARGS_ANY, NARGS_AT_LEAST_ONE, nargs))
+        if nargs is not None and flag:
+            raise ValueError("A flag can not be variadic!")
+
+        if builtin_converter:
+            _check_constraint_types(self.names[0], type, nargs is not None, min, max, min_len, max_len)
+
+        if pure is None:
+            # arrays are mutable, so variadic values are never considered pure
+            pure = builtin_converter and validator is None and nargs is None
+        pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+
+        self._set(
+            description=description.strip(),
+            example=example,
+            flag=flag,
+            type=type,
+            # whether the converter is one of the built-in ones, which are never offloaded to an executor
+            builtin_converter=builtin_converter,
+            converter=converter,
+            optional=optional,
+            default=default,
+            validator=validator,
+            nargs=nargs,
+            # most arguments don't have any constraints, so they are kept in a separate object
+            constraints=Constraints(self.names[0], nargs is not None, min, max, min_len, max_len, pattern)
+            if any(map(lambda x: x is not None, [min, max, min_len, max_len, pattern])) else None,
+            pure=pure,
+            executor=executor,
+            # converter results by raw string value, see converter_cache.hit_rate for statistics
+            converter_cache=LRUCache(cache_size, ttl=cache_ttl) if cache_size is not None else None,
+            # determined once, since they are checked for every value
+            async_converter=is_async_callable(converter),
+            # whether the converter or the validator of this argument is an async function
+            is_async=is_async_callable(converter) or is_async_callable(validator),
+        )
+
+    def _set(self, **attributes):
+        """
+        Sets attributes during construction, since arguments are immutable afterwards
+        :param attributes: attribute name -> value
+        """
+        for key, value in attributes.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("{} is immutable".format(self.__class__.__name__))
+
+    def __delattr__(self, key):
+        raise AttributeError("{} is immutable".format(self.__class__.__name__))
 
     @property
     def name(self) -> str:
         return self.names[0]
 
-    def parse_arg_value(self, arg: str) -> any:
+    @property
+    def min(self) -> any:
+        return self.constraints.min if self.constraints is not None else None
+
+    @property
+    def max(self) -> any:
+        return self.constraints.max if self.constraints is not None else None
+
+    @property
+    def min_len(self) -> int or None:
+        return self.constraints.min_len if self.constraints is not None else None
+
+    @property
+    def max_len(self) -> int or None:
+        return self.constraints.max_len if self.constraints is not None else None
+
+    @property
+    def pattern(self) -> re.Pattern or None:
+        return self.constraints.pattern if self.constraints is not None else None
+
+    def parse_arg_value(self, arg: str or [str]) -> any:
         """
         Tries to parse the given value
-        :param arg: the string value
+        :param arg: the string value (a list of string values for variadic arguments)
         :return: the parsed value
         """
         if arg is None:
-            if self.optional:
-                return self.default
-            else:
-                raise ValueError("Missing required argument: '{}'".format(self.names[0]))
+            if self.nargs != NARGS_ANY or self.optional:
+                return self._missing_value()
+            arg = []
 
-        parsed = self.converter(arg)
+        if self.is_async:
+            raise TypeError(
+                "Argument '{}' has an async converter or validator, use parse_arg_value_async".format(self.names[0]))
+
+        if self.nargs is not None:
+            parsed = self._convert_values(arg)
+        else:
+            parsed = self._convert_value(arg)
+        if self.constraints is not None:
+            self.constraints.check(arg, parsed)
         if self.validator is not None:
             if not self.validator(parsed):
-                raise ValueError("Invalid value for argument '{}': '{}'".format(self.names[0], arg))
+                raise ValueError("Invalid value for argument '{}': '{}'".format(self.names[0], self._format(arg)))
         return parsed
 
-    @staticmethod
-    def _boolean_converter(value: str) -> bool:
+    async def parse_arg_value_async(self, arg: str or [str], executor: Executor = None) -> any:
         """
-        Converts a string to a boolean
-        :param value: string value
-        :return: boolean
+        Tries to parse the given value, awaiting the converter and validator if necessary
+        :param arg: the string value (a list of string values for variadic arguments)
+        :param executor: the executor to run a synchronous custom converter on,
+                         overridden by the executor of this argument (if any)
+        :return: the parsed value
         """
-        s = str(value).lower()
-        if s in ['y', 'yes', 'true', 't', '1']:
-            return True
-        elif s in ['n', 'no', 'false', 'f', '0']:
-            return False
+        if arg is None:
+            if self.nargs != NARGS_ANY or self.optional:
+                return self._missing_value()
+            arg = []
+
+        if self.executor is not None:
+            executor = self.executor
+        if executor is not None and (self.builtin_converter or self.async_converter):
+            executor = None
+
+        if self.nargs is None:
+            parsed = await self._convert_value_async(arg, executor)
+        elif executor is not None:
+            parsed = await self._convert_values_async(arg, executor)
+        elif self.async_converter:
+            self._check_value_count(arg)
+            parsed = list(await asyncio.gather(*map(self._convert_value_async, arg)))
         else:
-            raise ValueError("Invalid value '{}'".format(value))
+            parsed = self._convert_values(arg)
+
+        if self.constraints is not None:
+            self.constraints.check(arg, parsed)
+        if self.validator is not None:
+            valid = self.validator(parsed)
+            if inspect.isawaitable(valid):
+                valid = await valid
+            if not valid:
+                raise ValueError("Invalid value for argument '{}': '{}'".format(self.names[0], self._format(arg)))
+        return parsed
+
+    def _convert_value(self, arg: str) -> any:
+        """
+        Converts a single value, using the converter cache (if enabled)
+        :param arg: the string value
+        :return: the converted value
+        """
+        parsed = self._cached_converter_value(arg)
+        if parsed is _MISSING:
+            parsed = self.converter(arg)
+            self._cache_converter_value(arg, parsed)
+        return parsed
+
+    async def _convert_value_async(self, arg: str, executor: Executor = None) -> any:
+        """
+        Converts a single value, using the converter cache (if enabled)
+        :param arg: the string value
+        :param executor: the executor to run the converter on, if any
+        :return: the converted value
+        """
+        parsed = self._cached_converter_value(arg)
+        if parsed is _MISSING:
+            if executor is not None:
+                parsed = await asyncio.get_running_loop().run_in_executor(executor, self.converter, arg)
+            else:
+                parsed = self.converter(arg)
+            if inspect.isawaitable(parsed):
+                parsed = await parsed
+            self._cache_converter_value(arg, parsed)
+        return parsed
+
+    def _convert_values(self, args: [str]) -> array or list:
+        """
+        Converts all values of a variadic argument in a single pass
+        :param args: the string values
+        :return: an array for built-in numeric types, a list otherwise
+        """
+        self._check_value_count(args)
+        if self.builtin_converter:
+            if self.type is int:
+                return self._to_array("q", int, args)
+            elif self.type is float:
+                return self._to_array("d", _float_converter, args)
+        return list(map(self._convert_value, args))
+
+    async def _convert_values_async(self, args: [str], executor: Executor) -> list:
+        """
+        Converts all values of a variadic argument with a single call on the given executor,
+        using the converter cache (if enabled)
+        :param args: the string values
+        :param executor: the executor to run the converter on
+        :return: list of converted values
+        """
+        self._check_value_count(args)
+        parsed = list(map(self._cached_converter_value, args))
+        missing = list(filter(lambda x: parsed[x] is _MISSING, range(len(args))))
+        if len(missing) > 0:
+            converted = await asyncio.get_running_loop().run_in_executor(
+                executor, _convert_all, self.converter, list(map(lambda x: args[x], missing)))
+            for idx, value in zip(missing, converted):
+                parsed[idx] = value
+                self._cache_converter_value(args[idx], value)
+        return parsed
+
+    def _to_array(self, typecode: str, converter: callable, args: [str]) -> array:
+        """
+        :param typecode: the array typecode
+        :param converter: the element converter
+        :param args: the string values
+        :return: array of converted values
+        """
+        try:
+            return array(typecode, map(converter, args))
+        except OverflowError:
+            raise ValueError("Value out of range for argument '{}'".format(self.names[0]))
+
+    def _check_value_count(self, args: [str]):
+        """
+        Checks the number of values given for a variadic argument
+        :param args: the string values
+        """
+        if self.nargs == NARGS_AT_LEAST_ONE:
+            if len(args) <= 0:
+                raise ValueError("Expected at least one value for argument '{}'".format(self.names[0]))
+        elif self.nargs != NARGS_ANY and len(args) != self.nargs:
+            raise ValueError("Expected {} values for argument '{}' but found {}".format(
+                self.nargs, self.names[0], len(args)))
 
     @staticmethod
-    def _float_converter(value: str) -> float:
+    def _format(arg: str or [str]) -> str:
         """
-        Converts a string to a float
-        :param value: string value
-        :return: float
+        :param arg: the string value (a list of string values for variadic arguments)
+        :return: the value as shown in error messages
         """
-        if '%' == value[-1]:
-            return float(value[:-1]) / 100.0
+        return " ".join(arg) if isinstance(arg, list) else arg
+
+    def _cached_converter_value(self, arg: str) -> any:
+        """
+        :param arg: the string value
+        :return: the cached converter result for the given value, or _MISSING
+        """
+        if self.converter_cache is None:
+            return _MISSING
+        return self.converter_cache.get(arg, _MISSING)
+
+    def _cache_converter_value(self, arg: str, parsed: any):
+        """
+        Remembers the converter result for the given value (if caching is enabled)
+        :param arg: the string value
+        :param parsed: the converter result
+        """
+        if self.converter_cache is not None:
+            self.converter_cache.put(arg, parsed)
+
+    def _missing_value(self) -> any:
+        """
+        :return: the value of this argument if it was not specified
+        """
+        if self.optional:
+            return self.default
         else:
-            return float(value)
+            raise ValueError("Missing required argument: '{}'".format(self.names[0]))
 
     def _validate_names(self):
         """
@@ -136,10 +465,148 @@ class Argument:
             raise ValueError("Argument names must be unique! Clashing arguments: {}".format(clashing))
 
 
+def _check_constraint_types(name: str, type: type, variadic: bool, minimum: any, maximum: any, min_len: int or None,
+                            max_len: int or None):
+    """
+    Checks that the constraints of an argument using a built-in converter fit its type,
+    and raises an exception if not
+    :param name: the name of the argument
+    :param type: the type of the argument
+    :param variadic: whether the argument takes multiple values
+    :param minimum: the minimum value, if any
+    :param maximum: the maximum value, if any
+    :param min_len: the minimum length, if any
+    :param max_len: the maximum length, if any
+    """
+    if (min_len is not None or max_len is not None) and not variadic and type is not str:
+        raise ValueError("Length constraints require a str argument or multiple values: '{}'".format(name))
+
+    if minimum is None and maximum is None:
+        return
+    # a value of the type, to check if the bounds can be compared to it
+    sample = next(iter(type), None) if inspect.isclass(type) and issubclass(type, Enum) else type()
+    for bound in [minimum, maximum]:
+        if bound is None or sample is None:
+            continue
+        try:
+            sample < bound
+        except TypeError:
+            raise ValueError("Bound {} can not be compared to values of argument '{}' ({})".format(
+                repr(bound), name, type.__name__))
+
+
+class Constraints:
+    """
+    The declarative constraints of an argument, compiled into a single check function
+    """
+    __slots__ = ("min", "max", "min_len", "max_len", "pattern", "check")
+
+    def __init__(self, name: str, variadic: bool, minimum: any, maximum: any, min_len: int or None,
+                 max_len: int or None, pattern: re.Pattern or None):
+        """
+        Compiles the constraints of an argument
+        :param name: the name of the argument
+        :param variadic: whether the argument takes multiple values
+        :param minimum: the minimum value, if any
+        :param maximum: the maximum value, if any
+        :param min_len: the minimum length, if any
+        :param max_len: the maximum length, if any
+        :param pattern: the pattern string values have to match, if any
+        """
+        self.min = minimum
+        self.max = maximum
+        self.min_len = min_len
+        self.max_len = max_len
+        self.pattern = pattern
+        # function (string value, converted value) -> None, raising a ValueError if a constraint is violated
+        self.check = _compile_constraint_check(name, variadic, minimum, maximum, min_len, max_len, pattern)
+
+
+def _compile_constraint_check(name: str, variadic: bool, minimum: any, maximum: any, min_len: int or None,
+                              max_len: int or None, pattern: re.Pattern or None) -> callable or None:
+    """
+    Compiles the declarative constraints of an argument into a single check function
+    :param name: the name of the argument
+    :param variadic: whether the argument takes multiple values
+    :param minimum: the minimum value, if any
+    :param maximum: the maximum value, if any
+    :param min_len: the minimum length, if any
+    :param max_len: the maximum length, if any
+    :param pattern: the pattern string values have to match, if any
+    :return: a function (string value, converted value) -> None, raising a ValueError if a constraint is violated,
+             or None if there are no constraints
+    """
+    checks = []
+    if pattern is not None:
+        if variadic:
+            def check_pattern(raw, parsed):
+                for value in raw:
+                    if pattern.fullmatch(value) is None:
+                        raise ValueError("Value for argument '{}' must match '{}': '{}'".format(
+                            name, pattern.pattern, value))
+        else:
+            def check_pattern(raw, parsed):
+                if pattern.fullmatch(raw) is None:
+                    raise ValueError("Value for argument '{}' must match '{}': '{}'".format(
+                        name, pattern.pattern, raw))
+        checks.append(check_pattern)
+
+    # values of custom converters may not support a constraint, which must not be reported as an execution error
+    if minimum is not None:
+        def check_min(raw, parsed):
+            try:
+                # the smallest of all values of a variadic argument
+                value = min(parsed, default=minimum) if variadic else parsed
+                too_small = value < minimum
+            except TypeError:
+                raise ValueError("Value for argument '{}' can not be compared to {}: '{}'".format(name, minimum, raw))
+            if too_small:
+                raise ValueError("Value for argument '{}' must be at least {}: '{}'".format(name, minimum, value))
+        checks.append(check_min)
+
+    if maximum is not None:
+        def check_max(raw, parsed):
+            try:
+                # the largest of all values of a variadic argument
+                value = max(parsed, default=maximum) if variadic else parsed
+                too_large = value > maximum
+            except TypeError:
+                raise ValueError("Value for argument '{}' can not be compared to {}: '{}'".format(name, maximum, raw))
+            if too_large:
+                raise ValueError("Value for argument '{}' must be at most {}: '{}'".format(name, maximum, value))
+        checks.append(check_max)
+
+    if min_len is not None or max_len is not None:
+        def check_len(raw, parsed):
+            try:
+                length = len(parsed)
+            except TypeError:
+                raise ValueError("Value for argument '{}' has no length: '{}'".format(name, raw))
+            if min_len is not None and length < min_len:
+                raise ValueError("Value for argument '{}' must have a length of at least {}".format(name, min_len))
+            if max_len is not None and length > max_len:
+                raise ValueError("Value for argument '{}' must have a length of at most {}".format(name, max_len))
+        checks.append(check_len)
+
+    if len(checks) <= 0:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+
+    checks = tuple(checks)
+
+    def check_all(raw, parsed):
+        for check in checks:
+            check(raw, parsed)
+
+    return check_all
+
+
 class Flag(Argument):
     """
     Convenience class for specifying a flag argument
     """
+    __slots__ = ()
 
     def __init__(self, name: str or [str], description: str):
         """
@@ -154,23 +621,163 @@ class Selection(Argument):
     """
     Convenience class for a command argument based on a predefined selection of allowed values
     """
+    __slots__ = ("allowed_values", "ignore_case", "_value_index", "_prefix_trie", "_allowed_set")
 
     def __init__(self, name: str, description: str, allowed_values: [any], type: type = str, converter: callable = None,
-                 optional: bool = None, default: any = None):
+                 optional: bool = None, default: any = None, pure: bool = None, executor: Executor = None,
+                 cache_size: int = None, cache_ttl: float = None, ignore_case: bool = False,
+                 allow_prefix: bool = False):
         """
         Constructor
         :param name: the name of the argument
         :param description: a short description of the argument
         :param allowed_values: list of allowed (target type) values
         :param type: the expected type of the argument
-        :param converter: a converter function to convert the string value to the expected type
+        :param converter: a converter function to convert the string value to the expected type,
+                          only used if the string value doesn't match the string form of an allowed value
         :param optional: specifies if this argument is optional
         :param default: an optional default value
+        :param pure: whether the converter always returns the same result for the same input, without side effects
+        :param executor: an optional executor to run a CPU heavy converter on
+        :param cache_size: if set, the results of the converter are cached for up to this many distinct input values
+        :param cache_ttl: optional time (in seconds) after which a cached converter result expires
+        :param ignore_case: whether to match the string form of allowed values case-insensitively
+        :param allow_prefix: whether to accept unique prefixes of the string form of allowed values
         """
-        self.allowed_values = allowed_values
+        self._set(allowed_values=allowed_values, ignore_case=ignore_case)
+
+        # map string form -> index of allowed value
+        value_index = {}
+        for idx, value in enumerate(allowed_values):
+            key = self._canonical(str(value))
+            existing = value_index.setdefault(key, idx)
+            if allowed_values[existing] != value:
+                raise ValueError("Allowed values must have distinct string forms! Clashing values: {}, {}".format(
+                    allowed_values[existing], value))
+
+        # used for membership checks of converted values that are not found by their string form
+        try:
+            allowed_set = frozenset(allowed_values)
+        except TypeError:
+            allowed_set = None
+
+        self._set(
+            _value_index=value_index,
+            _prefix_trie=PrefixTrie(value_index.items()) if allow_prefix else None,
+            _allowed_set=allowed_set,
+        )
 
-        def validator(x):
-            return x in self.allowed_values
+        if pure is None:
+            # the lookup itself is pure
+            pure = converter is None
 
         super().__init__(name, description, example=allowed_values[0], type=type, converter=converter,
-                         optional=optional, default=default, validator=validator)
+                         optional=optional, default=default, pure=pure, executor=executor,
+                         cache_size=cache_size, cache_ttl=cache_ttl)
+
+    def _convert_value(self, arg: str) -> any:
+        """
+        Looks up the allowed value matching the given value, using the converter as a fallback
+        :param arg: the string value
+        :return: the allowed value
+        """
+        result = self._lookup(arg)
+        if result is _MISSING:
+            result = self._lookup_converted(arg, super()._convert_value(arg))
+        return result
+
+    async def _convert_value_async(self, arg: str, executor: Executor = None) -> any:
+        """
+        Looks up the allowed value matching the given value, using the converter as a fallback.
+        The lookup always runs on the event loop, only the converter is run on the executor (if any).
+        :param arg: the string value
+        :param executor: the executor to run the converter on, if any
+        :return: the allowed value
+        """
+        result = self._lookup(arg)
+        if result is _MISSING:
+            result = self._lookup_converted(arg, await super()._convert_value_async(arg, executor))
+        return result
+
+    def _canonical(self, value: str) -> str:
+        """
+        :param value: the string form of a value
+        :return: the key of the value in the lookup index
+        """
+        return value.lower() if self.ignore_case else value
+
+    def _lookup(self, value: str) -> any:
+        """
+        Looks up an allowed value by its string form
+        :param value: the string value
+        :return: the allowed value, or _MISSING
+        """
+        key = self._canonical(value)
+        idx = self._value_index.get(key)
+        if idx is None and self._prefix_trie is not None:
+            idx = self._prefix_trie.get_unique(key)
+            if idx is None:
+                candidates = self._prefix_trie.keys_with_prefix(key)
+                if len(key) > 0 and len(candidates) > 1:
+                    raise ValueError("Ambiguous value for argument '{}': '{}', could be any of: {}".format(
+                        self.name, value, ", ".join(candidates)))
+        if idx is None:
+            return _MISSING
+        return self.allowed_values[idx]
+
+    def _lookup_converted(self, value: str, converted: any) -> any:
+        """
+        Checks if a converted value is allowed
+        :param value: the string value
+        :param converted: the converted value
+        :return: the converted value
+        """
+        try:
+            if self._allowed_set is not None:
+                allowed = converted in self._allowed_set
+            else:
+                allowed = converted in self.allowed_values
+        except TypeError:
+            # unhashable converted value
+            allowed = converted in self.allowed_values
+        if not allowed:
+            raise ValueError("Invalid value for argument '{}': '{}'".format(self.name, value))
+        return converted
+
+
+class Remainder(Argument):
+    """
+    Convenience class for an argument that takes the untokenized rest of the message,
+    f.ex. free text like in "/note Buy milk, don't forget "the good one"".
+    """
+    __slots__ = ()
+
+    remainder = True
+
+    def __init__(self, name: str or [str], description: str, example: str, type: type = str,
+                 converter: callable = None, optional: bool = False, default: any = None, validator: callable = None,
+                 pure: bool = None, executor: Executor = None, cache_size: int = None, cache_ttl: float = None,
+                 min_len: int = None, max_len: int = None, pattern: str or re.Pattern = None):
+        """
+        Creates a command argument object
+        :param name: the name (or names) of the argument
+        :param description: a short description of the argument
+        :param example: an example (string!) value for this argument
+        :param type: the expected type of the argument
+        :param converter: a converter function to convert the string value to the expected type
+        :param optional: specifies if this argument is optional
+        :param default: an optional default value
+        :param validator: a validator function
+        :param pure: whether converter and validator always return the same result for the same input,
+                     without side effects
+        :param executor: an optional executor to run a CPU heavy converter on
+        :param cache_size: if set, the results of the converter are cached for up to this many distinct input values
+        :param cache_ttl: optional time (in seconds) after which a cached converter result expires
+        :param min_len: the minimum length of the converted value
+        :param max_len: the maximum length of the converted value
+        :param pattern: a regular expression the whole text has to match
+        """
+        super().__init__(name, description, example=example, type=type, converter=converter,
+                         optional=optional, default=default, validator=validator, pure=pure, executor=executor,
+                         cache_size=cache_size, cache_ttl=cache_ttl, min_len=min_len, max_len=max_len,
+                         pattern=pattern)
@@ -0,0 +1,118 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import threading
+import time
+from collections import OrderedDict
+
+# marker for missing cache entries, since None is a valid value
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    A thread-safe, size bounded least-recently-used cache that keeps track of its hit rate
+    """
+
+    def __init__(self, maxsize: int, ttl: float = None, timer: callable = time.monotonic):
+        """
+        Creates a cache
+        :param maxsize: the maximum number of entries
+        :param ttl: optional time (in seconds) after which an entry expires
+        :param timer: the clock used to expire entries
+        """
+        if maxsize <= 0:
+            raise ValueError("Cache size must be positive: {}".format(maxsize))
+        if ttl is not None and ttl <= 0:
+            raise ValueError("Cache ttl must be positive: {}".format(ttl))
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: any, default: any = None) -> any:
+        """
+        Looks up a cache entry and marks it as recently used
+        :param key: the key of the entry
+        :param default: the value to return if there is no entry for the given key
+        :return: the cached value or the default
+        """
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires = entry
+            if expires is not None and expires <= self._timer():
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: any, value: any):
+        """
+        Adds (or replaces) a cache entry, evicting the least recently used entry if the cache is full
+        :param key: the key of the entry
+        :param value: the value to cache
+        """
+        expires = self._timer() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries and resets the statistics
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        :return: the ratio of lookups that were answered from the cache
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: any):
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            return False
+        expires = entry[1]
+        return expires is None or expires > self._timer()
+
+    def __repr__(self):
+        return "<{} size={}/{} hits={} misses={}>".format(
+            self.__class__.__name__, len(self), self.maxsize, self.hits, self.misses)
@@ -24,7 +24,13 @@ ARG_NAMING_PREFIXES = LONG_ARG_KEY_PREFIXES + ABBREVIATED_ARG_KEY_PREFIXES
 
 ARG_VALUE_SEPARATOR_CHAR = "="
 
+# variadic argument value counts
+NARGS_ANY = "*"
+NARGS_AT_LEAST_ONE = "+"
+
 QUOTE_CHARS = ['"', '\'']
+ESCAPE_CHAR = "\\"
+TOKEN_SEPARATOR_CHARS = [" ", "\t"]
 
 KEY_NAMES = "names"
 KEY_DESCRIPTION = "description"
@@ -32,3 +38,4 @@ KEY_ARGUMENTS = "arguments"
 KEY_HELP_MESSAGE = "help_message"
 KEY_PERMISSIONS = "permissions"
 KEY_HIDDEN = "hidden"
+KEY_CALLBACK = "callback"
@@ -19,140 +19,124 @@
 #  SOFTWARE.
 
 import functools
+import inspect
 import logging
+from concurrent.futures import Executor
 from typing import List
 
 from telegram import Update
-from telegram.ext import ContextTypes, CallbackContext
+from telegram.ext import CallbackContext
 
 from telegram_click import CommandTarget
 from telegram_click.argument import Argument
+from telegram_click.cache import LRUCache
 from telegram_click.const import *
-from telegram_click.error_handler import ErrorHandler, DEFAULT_ERROR_HANDLER
-from telegram_click.help import generate_help_message
-from telegram_click.parser import parse_telegram_command, split_command_from_args, split_command_from_target
+from telegram_click.error_handler import ErrorHandler, DEFAULT_ERROR_HANDLER, handle_error
+from telegram_click.group import ArgumentGroup
+from telegram_click.help import generate_help_message, generate_group_help_message
+from telegram_click.message import get_parsed_message
+from telegram_click.parser import ParsePlan, ParseLimits, split_subcommand_from_args
 from telegram_click.permission.base import Permission
-from telegram_click.util import find_first, find_duplicates
+from telegram_click.pipeline import CommandPipeline, check_permissions, filter_command_target
+from telegram_click.ratelimit import RateLimit
+from telegram_click.registry import CommandRegistry
+from telegram_click.util import find_first, find_duplicates, accepts_keyword
 
 LOGGER = logging.getLogger(__name__)
 
 
-async def _check_permissions(update: Update, context: ContextTypes.DEFAULT_TYPE,
-                             permissions: Permission) -> bool:
+def _find_update_context_indexes(func: callable) -> (int, int):
     """
-    Checks if a message passes permission tests
-    :param update: message update
-    :param context: message context
-    :param permissions: command permissions
-    :return: True if authorized, False otherwise
+    Determines the positional indexes of the update and context arguments a callback is called with
+    :param func: the callback function
+    :return: (update index, context index)
     """
-    if permissions is not None:
-        return await permissions.evaluate(update, context)
-    else:
-        return True
+    try:
+        parameters = list(inspect.signature(func).parameters.values())
+    except (TypeError, ValueError):
+        return 0, 1
 
+    # functions decorated within a class body are called as bound methods
+    offset = 1 if len(parameters) > 0 and parameters[0].name in ["self", "cls"] else 0
+    return offset, offset + 1
 
-def _create_callback_wrapper(func: callable, help_message: str,
-                             arguments: [Argument],
-                             permissions: Permission,
-                             command_target: bytes,
-                             error_handlers: List[ErrorHandler]) -> callable:
+
+def _create_callback_wrapper(func: callable, pipeline: CommandPipeline) -> callable:
     """
-    Creates the wrapper function for the callback function
+    Creates the wrapper function for the callback function.
+    Everything that only depends on the callback and the command is determined upfront,
+    so the wrapper only does the work necessary for each update.
     :param func: the function to wrap
-    :param help_message: command help message
-    :param arguments: command arguments
-    :param permissions: command permissions
-    :param command_target: command target
-    :param error_handlers: list of error handlers
+    :param pipeline: the stages an update has to pass before the function is called
     :return: wrapper function
     """
     if not callable(func):
         raise AttributeError("Unsupported type: {}".format(func))
 
+    update_index, context_index = _find_update_context_indexes(func)
+    error_handlers = pipeline.error_handlers
+    # argument names converted to python param naming convention (snake-case), in order of the parsed values
+    kwarg_names = pipeline.parse_plan.kwarg_names
+    # pass the parsed message to callbacks declaring a parameter for it (unless an argument has the same name)
+    pass_parsed_message = (accepts_keyword(func, "parsed_message", var_keyword=False)
+                           and "parsed_message" not in kwarg_names)
+    has_kwargs = len(kwarg_names) > 0 or pass_parsed_message
+
     @functools.wraps(func)
     async def wrapper(*args, **kwargs):
         # find function arguments
-        update = find_first(args, Update)
-        context = find_first(args, CallbackContext)
-
-        # get bot, chat and message info
-        bot = context.bot
-        message = update.effective_message
-        chat_id = message.chat_id
+        if len(args) > context_index:
+            update = args[update_index]
+            context = args[context_index]
+        else:
+            update = context = None
+        if not isinstance(update, Update) or not isinstance(context, CallbackContext):
+            # unexpected call signature
+            update = find_first(args, Update)
+            context = find_first(args, CallbackContext)
+
+        parsed_message = get_parsed_message(update, context)
 
         try:
-            if not await _check_permissions(update, context, permissions):
-                # permission denied
-                LOGGER.debug("Permission denied in chat {} for user {} for message: {}".format(
-                    chat_id,
-                    update.effective_message.from_user.id,
-                    message))
-
-                for handler in error_handlers:
-                    if await handler.on_permission_error(update, context, permissions):
-                        break
-
-                # don't process command
-                return
-
-            # parse and check command target
-            cmd, _ = split_command_from_args(message.text)
-            _, target = split_command_from_target(bot.username, cmd)
-            # check if we are allowed to process the given command target
-            if not await filter_command_target(target, bot.username, command_target):
-                LOGGER.debug("Ignoring command for unspecified target {} in chat {} for user {}: {}".format(
-                    target,
-                    chat_id,
-                    update.effective_message.from_user.id,
-                    message))
-
+            parsed_args = await pipeline.run(update, context, parsed_message)
+            if parsed_args is None:
                 # don't process command
                 return
 
-            try:
-                # parse command and arguments
-                cmd, parsed_args = parse_telegram_command(bot.username, message.text, arguments)
-            except ValueError as ex:
-                # error during argument parsing
-                logging.exception("Error parsing command arguments")
-
-                for handler in error_handlers:
-                    if await handler.on_validation_error(update, context, ex, help_message):
-                        break
-
-                return
+            if not has_kwargs:
+                return await func(*args, **kwargs)
 
-            # convert argument names to python param naming convention (snake-case)
-            kw_function_args = dict(map(lambda x: (x[0].lower().replace("-", "_"), x[1]), list(parsed_args.items())))
+            kw_function_args = dict(zip(kwarg_names, parsed_args.values()))
+            if pass_parsed_message:
+                kw_function_args["parsed_message"] = parsed_message
+            if kwargs:
+                kw_function_args.update(kwargs)
             # execute wrapped function
-            return await func(*args, **{**kw_function_args, **kwargs})
+            return await func(*args, **kw_function_args)
         except Exception as ex:
             # error while executing wrapped function
             logging.exception("Error in callback")
-            for handler in error_handlers:
-                if await handler.on_execution_error(update, context, ex):
-                    break
+            parsed_message.errors.append(ex)
+            await handle_error(error_handlers, "on_execution_error", update, context, ex,
+                               parsed_message=parsed_message)
 
+    wrapper.pipeline = pipeline
+    # whether the callback has to be called as bound method, see CommandRouter
+    wrapper.is_method = update_index > 0
     return wrapper
 
 
-def check_command_name_clashes(names: List[str]):
+def check_command_name_clashes(names: List[str], registry: CommandRegistry = None):
     """
     Checks if a command name has been used multiple times and raises an exception if so
     :param names: command names added in this decorator call
+    :param registry: the registry to check, COMMAND_LIST is used if None
     """
-    from telegram_click import COMMAND_LIST
-
-    t = []
-    t.extend(map(lambda x: x["names"], COMMAND_LIST))
-    t.extend([names])
-    t = functools.reduce(list.__add__, t)
+    if registry is None:
+        from telegram_click import COMMAND_LIST
+        registry = COMMAND_LIST
 
-    duplicates = find_duplicates(t)
-    if len(duplicates) > 0:
-        clashing = ", ".join(duplicates.keys())
-        raise ValueError("Command names must be unique! Clashing names: {}".format(clashing))
+    registry.check_name_clashes(names)
 
 
 def check_argument_name_clashes(arguments: List[Argument]):
@@ -181,12 +165,47 @@ def check_optional_argument_after_other(command_name: str, arguments: List[Argum
             optional_detected = True
 
 
+def check_remainder_argument_last(command_name: str, arguments: List[Argument]):
+    """
+    Checks that an argument taking the rest of the message is the last argument of a command
+    :param command_name: command name the arguments belong to
+    :param arguments: arguments to check
+    """
+    for arg in arguments[:-1]:
+        if arg.remainder:
+            raise AssertionError(
+                "Remainder argument has to be the last argument in command /{}: {}".format(command_name, arg.name))
+
+
+def check_variadic_argument_last(command_name: str, arguments: List[Argument]):
+    """
+    Checks that an argument taking multiple values is the last positional argument of a command
+    (which also rules out combining it with a remainder argument)
+    :param command_name: command name the arguments belong to
+    :param arguments: arguments to check
+    """
+    positional = list(filter(lambda x: not x.flag, arguments))
+    for arg in positional[:-1]:
+        if arg.nargs is not None:
+            raise AssertionError(
+                "Variadic argument has to be the last positional argument in command /{}: {}".format(
+                    command_name, arg.name))
+
+
 def command(name: str or [str], description: str = None,
             arguments: [Argument] = None,
             hidden: bool or callable = None,
             permissions: Permission = None,
             command_target: bytes = CommandTarget.UNSPECIFIED | CommandTarget.SELF,
-            error_handler: ErrorHandler = None):
+            error_handler: ErrorHandler = None,
+            lazy_parsing: bool = False,
+            parse_cache: LRUCache = None,
+            parse_limits: ParseLimits = None,
+            executor: Executor = None,
+            groups: [ArgumentGroup] = None,
+            rate_limit: RateLimit = None,
+            stages: [str] = None,
+            registry: CommandRegistry = None):
     """
     Decorator to turn a command handler function into a full fledged, shell like command
     :param name: Name of the command
@@ -196,8 +215,22 @@ def command(name: str or [str], description: str = None,
     :param permissions: required permissions to run this command
     :param command_target: command targets to accept
     :param error_handler: a customized error handler
+    :param lazy_parsing: stop parsing as soon as all arguments are bound, ignoring any excess text
+    :param parse_cache: a cache for parse results (may be shared between commands), requires all arguments to be pure
+    :param parse_limits: limits for the argument text, exceeding them is treated as a validation error
+                         (telegram_click.parser.DEFAULT_PARSE_LIMITS is used if None)
+    :param executor: an executor (f.ex. a ThreadPoolExecutor) to run custom converters on,
+                     so CPU heavy conversions don't block other updates
+    :param groups: constraints on which arguments may be specified together
+                   (see telegram_click.group), checked before any argument value is converted
+    :param rate_limit: limits how often the command can be used (per user by default)
+    :param stages: the order of the checks an update has to pass (see telegram_click.pipeline.Stage),
+                   telegram_click.pipeline.DEFAULT_STAGES is used if None
+    :param registry: the registry to add the command to, COMMAND_LIST is used if None
     """
-    from telegram_click import COMMAND_LIST
+    if registry is None:
+        from telegram_click import COMMAND_LIST
+        registry = COMMAND_LIST
 
     name = [name] if not isinstance(name, list) else name
     if arguments is None:
@@ -206,53 +239,341 @@ def command(name: str or [str], description: str = None,
     if hidden is None:
         hidden = False
 
-    check_command_name_clashes(name)
-    check_argument_name_clashes(arguments)
-    check_optional_argument_after_other(name, arguments)
-
-    help_message = generate_help_message(name, description, arguments)
-
-    COMMAND_LIST.append(
-        {
-            KEY_NAMES: name,
-            KEY_DESCRIPTION: description,
-            KEY_ARGUMENTS: arguments,
-            KEY_HELP_MESSAGE: help_message,
-            KEY_PERMISSIONS: permissions,
-            KEY_HIDDEN: hidden
-        }
-    )
+    check_command_name_clashes(name, registry)
 
     error_handlers = [DEFAULT_ERROR_HANDLER]
     if error_handler is not None:
         error_handlers.insert(0, error_handler)
 
+    help_message, create_wrapper = _create_command(
+        name, name, description, arguments, permissions, command_target, error_handlers,
+        lazy_parsing, parse_cache, parse_limits, executor, groups, rate_limit, stages)
+
+    command_list_entry = {
+        KEY_NAMES: name,
+        KEY_DESCRIPTION: description,
+        KEY_ARGUMENTS: arguments,
+        KEY_HELP_MESSAGE: help_message,
+        KEY_PERMISSIONS: permissions,
+        KEY_HIDDEN: hidden,
+        KEY_CALLBACK: None
+    }
+    registry.register(command_list_entry)
+
     def callback_decorator(func: callable):
         """
         Callback decorator function
         :param func: the function to wrap
         :return: wrapper function
         """
-        return _create_callback_wrapper(
-            func, help_message, arguments, permissions,
-            command_target, error_handlers)
+        wrapper = create_wrapper(func)
+        # used by CommandRouter to route commands to the wrapper
+        wrapper.command_names = name
+        command_list_entry[KEY_CALLBACK] = wrapper
+        return wrapper
 
     return callback_decorator
 
 
-async def filter_command_target(target: str or None, bot_username: str, allowed_targets: bytes):
+def _create_command(name: [str], help_names: [str], description: str or None, arguments: [Argument],
+                    permissions: Permission or None, command_target: bytes, error_handlers: List[ErrorHandler],
+                    lazy_parsing: bool, parse_cache: LRUCache or None, parse_limits: ParseLimits or None,
+                    executor: Executor or None, groups: [ArgumentGroup] or None,
+                    rate_limit: RateLimit or None, stages: [str] or None,
+                    subcommand_depth: int = 0) -> (str, callable):
+    """
+    Checks the arguments of a command and compiles everything needed to handle it
+    :param name: names of the command
+    :param help_names: names of the command as shown in the help message (f.ex. "repo add" for a subcommand)
+    :param subcommand_depth: the number of subcommand names preceding the arguments
+    :return: (help message, callback decorator)
+    """
+    check_argument_name_clashes(arguments)
+    check_optional_argument_after_other(name, arguments)
+    check_remainder_argument_last(name, arguments)
+    check_variadic_argument_last(name, arguments)
+
+    help_message = generate_help_message(help_names, description, arguments)
+    parse_plan = ParsePlan(arguments, lazy=lazy_parsing, cache=parse_cache, limits=parse_limits,
+                           executor=executor, groups=groups)
+    pipeline = CommandPipeline(help_message, parse_plan, permissions, command_target, error_handlers,
+                               rate_limit=rate_limit, stages=stages, subcommand_depth=subcommand_depth)
+
+    def callback_decorator(func: callable):
+        """
+        Callback decorator function
+        :param func: the function to wrap
+        :return: wrapper function
+        """
+        return _create_callback_wrapper(func, pipeline)
+
+    return help_message, callback_decorator
+
+
+class CommandGroup:
+    """
+    A command with subcommands (f.ex. "/repo add" and "/repo remove"), that can be nested.
+    Subcommands are dispatched by walking a trie of subcommand names, one token at a time.
+    """
+
+    def __init__(self, names: [str], description: str or None, permissions: Permission or None,
+                 command_target: bytes, error_handlers: List[ErrorHandler], path: [str], func: callable):
+        """
+        :param names: names of the group
+        :param description: a short description of the group
+        :param permissions: required permissions to run any subcommand of this group
+        :param command_target: command targets to accept
+        :param error_handlers: list of error handlers
+        :param path: the (primary) names of all parent groups and this group, f.ex. ["repo", "remote"]
+        :param func: the function to call if no subcommand is given
+        """
+        self.names = names
+        self.description = description
+        self.permissions = permissions
+        self.command_target = command_target
+        self.error_handlers = error_handlers
+        self.path = path
+        self.func = func
+        # subcommand name (or alias) -> nested CommandGroup or callback wrapper
+        self.children = {}
+        # (names, description) of visible subcommands, in order of registration
+        self.subcommands = []
+        # registry entry of a top level group
+        self.command_list_entry = None
+        self.help_message = None
+        self._update_help_message()
+
+    def command(self, name: str or [str], description: str = None,
+                arguments: [Argument] = None,
+                hidden: bool = False,
+                permissions: Permission = None,
+                error_handler: ErrorHandler = None,
+                lazy_parsing: bool = False,
+                parse_cache: LRUCache = None,
+                parse_limits: ParseLimits = None,
+                executor: Executor = None,
+                groups: [ArgumentGroup] = None,
+                rate_limit: RateLimit = None,
+                stages: [str] = None):
+        """
+        Decorator to turn a function into a subcommand of this group.
+        Parameters are the same as for the @command decorator.
+        """
+        name = [name] if not isinstance(name, list) else name
+        if arguments is None:
+            arguments = []
+
+        self._check_subcommand_name_clashes(name)
+
+        error_handlers = list(self.error_handlers)
+        if error_handler is not None:
+            error_handlers.insert(0, error_handler)
+
+        help_names = list(map(lambda x: " ".join(self.path + [x]), name))
+        _, callback_decorator = _create_command(
+            name, help_names, description, arguments, permissions, self.command_target, error_handlers,
+            lazy_parsing, parse_cache, parse_limits, executor, groups, rate_limit, stages,
+            subcommand_depth=len(self.path))
+
+        def decorator(func: callable):
+            wrapper = callback_decorator(func)
+            self._add_child(name, description, hidden, wrapper)
+            return wrapper
+
+        return decorator
+
+    def group(self, name: str or [str], description: str = None,
+              hidden: bool = False,
+              permissions: Permission = None,
+              error_handler: ErrorHandler = None):
+        """
+        Decorator to turn a function into a nested group of this group,
+        the function is called if the nested group is invoked without a subcommand
+        :param name: name (or names) of the nested group
+        :param description: a short description of the nested group
+        :param hidden: whether the nested group should be hidden from the help output of this group
+        :param permissions: required permissions to run any subcommand of the nested group
+        :param error_handler: a customized error handler
+        """
+        name = [name] if not isinstance(name, list) else name
+        self._check_subcommand_name_clashes(name)
+
+        error_handlers = list(self.error_handlers)
+        if error_handler is not None:
+            error_handlers.insert(0, error_handler)
+
+        def decorator(func: callable):
+            nested = CommandGroup(name, description, permissions, self.command_target, error_handlers,
+                                  self.path + [name[0]], func)
+            wrapper = nested.create_wrapper()
+            self._add_child(name, description, hidden, nested)
+            return wrapper
+
+        return decorator
+
+    def create_wrapper(self) -> callable:
+        """
+        Creates the callback that dispatches updates to the subcommands of this group
+        :return: wrapper function
+        """
+        if not callable(self.func):
+            raise AttributeError("Unsupported type: {}".format(self.func))
+
+        @functools.wraps(self.func)
+        async def wrapper(*args, **kwargs):
+            return await self.dispatch(*args, **kwargs)
+
+        wrapper.command = self.command
+        wrapper.group = self.group
+        wrapper.command_group = self
+        wrapper.is_method = _find_update_context_indexes(self.func)[0] > 0
+        return wrapper
+
+    async def dispatch(self, *args, **kwargs):
+        """
+        Calls the subcommand named in the message
+        :param args: callback arguments (including update and context)
+        :param kwargs: callback keyword arguments
+        """
+        update = find_first(args, Update)
+        context = find_first(args, CallbackContext)
+
+        bot = context.bot
+        message = update.effective_message
+        chat_id = message.chat_id
+        parsed_message = get_parsed_message(update, context)
+
+        try:
+            target = parsed_message.target
+            # check the command target first, since it doesn't require any network requests
+            if not await filter_command_target(target, bot.username, self.command_target):
+                LOGGER.debug("Ignoring command for unspecified target {} in chat {} for user {}: {}".format(
+                    target,
+                    chat_id,
+                    update.effective_message.from_user.id,
+                    message))
+                return
+
+            # skip the names of the parent groups
+            _, args_text = parsed_message.subcommand_args(len(self.path) - 1)
+
+            group = self
+            while True:
+                if not await check_permissions(update, context, group.permissions):
+                    LOGGER.debug("Permission denied in chat {} for user {} for message: {}".format(
+                        chat_id,
+                        update.effective_message.from_user.id,
+                        message))
+
+                    await handle_error(group.error_handlers, "on_permission_error", update, context,
+                                       group.permissions, parsed_message=parsed_message)
+                    return
+
+                subcommand, remaining = split_subcommand_from_args(args_text)
+                child = group.children.get(subcommand) if subcommand is not None else None
+                if not isinstance(child, CommandGroup):
+                    break
+                group = child
+                args_text = remaining
+
+            if child is not None:
+                # the subcommand wrapper handles its own errors
+                return await child(*args, **kwargs)
+
+            if subcommand is None:
+                return await group.func(*args, **kwargs)
+
+            ex = ValueError("Unknown subcommand '{}'".format(subcommand))
+            parsed_message.errors.append(ex)
+            await handle_error(group.error_handlers, "on_validation_error", update, context, ex, group.help_message,
+                               parsed_message=parsed_message)
+        except Exception as ex:
+            # error while executing wrapped function
+            logging.exception("Error in callback")
+            parsed_message.errors.append(ex)
+            await handle_error(self.error_handlers, "on_execution_error", update, context, ex,
+                               parsed_message=parsed_message)
+
+    def _check_subcommand_name_clashes(self, names: [str]):
+        """
+        Checks if a subcommand name has already been used in this group and raises an exception if so
+        :param names: names of the new subcommand
+        """
+        clashing = list(filter(lambda x: x in self.children, names))
+        clashing.extend(find_duplicates(names))
+        if len(clashing) > 0:
+            raise ValueError("Subcommand names must be unique! Clashing names: {}".format(", ".join(clashing)))
+
+    def _add_child(self, names: [str], description: str or None, hidden: bool, child: any):
+        """
+        Registers a subcommand or nested group
+        :param names: names of the subcommand
+        :param description: description of the subcommand
+        :param hidden: whether to hide the subcommand from the help message of this group
+        :param child: the callback wrapper of the subcommand, or the nested group
+        """
+        for name in names:
+            self.children[name] = child
+        if not hidden:
+            self.subcommands.append((names, description))
+        self._update_help_message()
+
+    def _update_help_message(self):
+        """
+        Regenerates the help message of this group, after a subcommand has been added
+        """
+        help_names = list(map(lambda x: " ".join(self.path[:-1] + [x]), self.names))
+        self.help_message = generate_group_help_message(help_names, self.description, self.subcommands)
+        if self.command_list_entry is not None:
+            self.command_list_entry[KEY_HELP_MESSAGE] = self.help_message
+
+
+def command_group(name: str or [str], description: str = None,
+                  hidden: bool or callable = None,
+                  permissions: Permission = None,
+                  command_target: bytes = CommandTarget.UNSPECIFIED | CommandTarget.SELF,
+                  error_handler: ErrorHandler = None,
+                  registry: CommandRegistry = None):
     """
-    Checks if the command target should be accepted based on given input
-    :param target: the target of the command or None
-    :param bot_username: the username of this bot
-    :param allowed_targets: the allowed command target bitmask
-    :return: True if allowed, False if not
+    Decorator to turn a function into a command with subcommands (f.ex. "/repo add --url x").
+    Subcommands are registered using the "command" (and "group") decorator of the returned wrapper function,
+    the decorated function itself is called if the command is invoked without a subcommand.
+    :param name: Name of the command
+    :param description: a short description of the command
+    :param hidden: whether the command should be hidden from help output
+    :param permissions: required permissions to run any subcommand
+    :param command_target: command targets to accept
+    :param error_handler: a customized error handler
+    :param registry: the registry to add the command to, COMMAND_LIST is used if None
     """
-    if target is None:
-        expected = CommandTarget.UNSPECIFIED
-    elif target == bot_username:
-        expected = CommandTarget.SELF
-    else:
-        expected = CommandTarget.OTHER
-
-    return expected & allowed_targets == expected
+    if registry is None:
+        from telegram_click import COMMAND_LIST
+        registry = COMMAND_LIST
+
+    name = [name] if not isinstance(name, list) else name
+    if hidden is None:
+        hidden = False
+
+    check_command_name_clashes(name, registry)
+
+    error_handlers = [DEFAULT_ERROR_HANDLER]
+    if error_handler is not None:
+        error_handlers.insert(0, error_handler)
+
+    def decorator(func: callable):
+        group = CommandGroup(name, description, permissions, command_target, error_handlers, [name[0]], func)
+        group.command_list_entry = {
+            KEY_NAMES: name,
+            KEY_DESCRIPTION: description,
+            KEY_ARGUMENTS: [],
+            KEY_HELP_MESSAGE: group.help_message,
+            KEY_PERMISSIONS: permissions,
+            KEY_HIDDEN: hidden
+        }
+        registry.register(group.command_list_entry)
+        wrapper = group.create_wrapper()
+        wrapper.command_names = name
+        group.command_list_entry[KEY_CALLBACK] = wrapper
+        return wrapper
+
+    return decorator
@@ -1,8 +1,13 @@
+import functools
+from typing import List
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from telegram_click.message import ParsedMessage
 from telegram_click.permission.base import Permission
-from telegram_click.util import send_message
+from telegram_click.ratelimit import RateLimit
+from telegram_click.util import send_message, accepts_keyword
 
 
 class ErrorHandler:
@@ -11,18 +16,31 @@ class ErrorHandler:
     """
 
     async def on_permission_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
-                                  permissions: Permission) -> bool:
+                                  permissions: Permission, parsed_message: ParsedMessage = None) -> bool:
         """
         This method is called when a user tries to execute a command without permission
         :param update: Message Update
         :param context: Callback context
         :param permissions: the permissions, at least one of which was missing
+        :param parsed_message: the parsed command message
+        :return: True if the error was handled, false otherwise
+        """
+        return False
+
+    async def on_rate_limit_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                  rate_limit: RateLimit, parsed_message: ParsedMessage = None) -> bool:
+        """
+        This method is called when a user exceeds the rate limit of a command
+        :param update: Message Update
+        :param context: Callback context
+        :param rate_limit: the rate limit that was exceeded
+        :param parsed_message: the parsed command message
         :return: True if the error was handled, false otherwise
         """
         return False
 
     async def on_validation_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE, exception: Exception,
-                                  help_message: str) -> bool:
+                                  help_message: str, parsed_message: ParsedMessage = None) -> bool:
         """
         This method is called when an exception is raised during
         argument user input validation.
@@ -30,18 +48,20 @@ class ErrorHandler:
         :param context: Callback context
         :param exception: the exception
         :param help_message: help message for the command that failed validation
+        :param parsed_message: the parsed command message
         :return: True if the error was handled, false otherwise
         """
         return False
 
     async def on_execution_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
-                                 exception: Exception) -> bool:
+                                 exception: Exception, parsed_message: ParsedMessage = None) -> bool:
         """
         This method is called when an exception is raised during
         the execution of a command
         :param update: Message Update
         :param context: Callback context
         :param exception: the exception
+        :param parsed_message: the parsed command message
         :return: true if the error was handled, false otherwise
         """
         return False
@@ -60,7 +80,7 @@ class DefaultErrorHandler(ErrorHandler):
         self.print_error = print_error
 
     async def on_permission_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
-                                  permissions: Permission) -> bool:
+                                  permissions: Permission, parsed_message: ParsedMessage = None) -> bool:
         bot = context.bot
         message = update.effective_message
         chat_id = message.chat_id
@@ -74,8 +94,13 @@ class DefaultErrorHandler(ErrorHandler):
 
         return True
 
+    async def on_rate_limit_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                  rate_limit: RateLimit, parsed_message: ParsedMessage = None) -> bool:
+        # silently ignore, answering would defeat the purpose of the limit
+        return True
+
     async def on_validation_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE, exception: Exception,
-                                  help_message: str) -> bool:
+                                  help_message: str, parsed_message: ParsedMessage = None) -> bool:
         bot = context.bot
         message = update.effective_message
         chat_id = message.chat_id
@@ -92,7 +117,7 @@ class DefaultErrorHandler(ErrorHandler):
         return True
 
     async def on_execution_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
-                                 exception: Exception) -> bool:
+                                 exception: Exception, parsed_message: ParsedMessage = None) -> bool:
         bot = context.bot
         message = update.effective_message
         chat_id = message.chat_id
@@ -112,3 +137,37 @@ class DefaultErrorHandler(ErrorHandler):
 
 
 DEFAULT_ERROR_HANDLER = DefaultErrorHandler()
+
+
+@functools.lru_cache(maxsize=None)
+def _accepts_parsed_message(handler_type: type, method_name: str) -> bool:
+    """
+    Checks if an error handler method accepts the parsed_message keyword argument,
+    which error handlers written before it existed don't
+    :param handler_type: the class of the error handler
+    :param method_name: the name of the method
+    :return: True if the parsed message can be passed, false otherwise
+    """
+    return accepts_keyword(getattr(handler_type, method_name), "parsed_message")
+
+
+async def handle_error(error_handlers: List[ErrorHandler], method_name: str,
+                       update: Update, context: ContextTypes.DEFAULT_TYPE, *args,
+                       parsed_message: ParsedMessage = None):
+    """
+    Calls the given method of each error handler, until one of them handles the error
+    :param error_handlers: list of error handlers
+    :param method_name: the name of the ErrorHandler method to call (f.ex. "on_validation_error")
+    :param update: message update
+    :param context: message context
+    :param args: additional arguments of the method
+    :param parsed_message: the parsed command message
+    """
+    for handler in error_handlers:
+        method = getattr(handler, method_name)
+        if _accepts_parsed_message(type(handler), method_name):
+            handled = await method(update, context, *args, parsed_message=parsed_message)
+        else:
+            handled = await method(update, context, *args)
+        if handled:
+            break
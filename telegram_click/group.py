@@ -0,0 +1,142 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+from abc import ABC, abstractmethod
+from typing import Mapping
+
+from telegram_click.const import ARG_NAMING_PREFIXES
+
+
+class ArgumentGroup(ABC):
+    """
+    A constraint on which arguments of a command may be specified together.
+    Groups are checked after the argument text has been bound to the arguments of a command,
+    but before any value is converted.
+    """
+    __slots__ = ("names",)
+
+    def __init__(self, *names: str):
+        """
+        :param names: the names (or aliases) of the arguments in this group
+        """
+        if len(names) <= 0:
+            raise ValueError("An argument group needs at least one argument!")
+        self.names = names
+
+    @abstractmethod
+    def compile(self, name_index: Mapping[str, int]) -> callable:
+        """
+        Compiles this group into a check function for a specific command
+        :param name_index: map of argument name (and alias) -> argument index
+        :return: function (bitmask of specified argument indices) -> None, raising a ValueError if violated
+        """
+        raise NotImplementedError()
+
+    @staticmethod
+    def _mask(name_index: Mapping[str, int], names: tuple) -> int:
+        """
+        :param name_index: map of argument name (and alias) -> argument index
+        :param names: argument names
+        :return: bitmask of the indices of the given arguments
+        """
+        mask = 0
+        for name in names:
+            idx = name_index.get(name)
+            if idx is None:
+                raise ValueError("Unknown argument in argument group: {}".format(name))
+            mask |= 1 << idx
+        return mask
+
+    @staticmethod
+    def _format(names: tuple) -> str:
+        """
+        :param names: argument names
+        :return: the argument keys as shown in error messages
+        """
+        arg_prefix = next(iter(ARG_NAMING_PREFIXES))
+        return ", ".join(map(lambda x: "{}{}".format(arg_prefix, x), names))
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, ", ".join(self.names))
+
+
+class ExactlyOneOf(ArgumentGroup):
+    """
+    Exactly one of the given arguments has to be specified
+    """
+    __slots__ = ()
+
+    def compile(self, name_index: Mapping[str, int]) -> callable:
+        group_mask = self._mask(name_index, self.names)
+        message = "Exactly one of {} has to be specified".format(self._format(self.names))
+
+        def check(mask: int):
+            specified = mask & group_mask
+            # zero or more than one bit set
+            if specified == 0 or specified & (specified - 1) != 0:
+                raise ValueError(message)
+
+        return check
+
+
+class AtMostOneOf(ArgumentGroup):
+    """
+    At most one of the given arguments may be specified
+    """
+    __slots__ = ()
+
+    def compile(self, name_index: Mapping[str, int]) -> callable:
+        group_mask = self._mask(name_index, self.names)
+        message = "Only one of {} may be specified".format(self._format(self.names))
+
+        def check(mask: int):
+            specified = mask & group_mask
+            # more than one bit set
+            if specified & (specified - 1) != 0:
+                raise ValueError(message)
+
+        return check
+
+
+class Requires(ArgumentGroup):
+    """
+    If the first argument is specified, all other given arguments have to be specified too
+    """
+    __slots__ = ()
+
+    def __init__(self, name: str, *required: str):
+        """
+        :param name: the name of the dependent argument
+        :param required: the names of the arguments it requires
+        """
+        if len(required) <= 0:
+            raise ValueError("Requires needs at least one required argument!")
+        super().__init__(name, *required)
+
+    def compile(self, name_index: Mapping[str, int]) -> callable:
+        dependent_mask = self._mask(name_index, self.names[:1])
+        required_mask = self._mask(name_index, self.names[1:])
+        message = "{} requires {}".format(self._format(self.names[:1]), self._format(self.names[1:]))
+
+        def check(mask: int):
+            if mask & dependent_mask and mask & required_mask != required_mask:
+                raise ValueError(message)
+
+        return check
@@ -17,6 +17,8 @@
 #  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
+import inspect
+from enum import Enum
 from typing import List
 
 from telegram_click.argument import Argument
@@ -67,6 +69,36 @@ def generate_help_message(names: [str], description: str, args: List[Argument])
     return "\n".join(lines)
 
 
+def generate_group_help_message(names: [str], description: str or None, subcommands: List[tuple]) -> str:
+    """
+    Generates a usage description for a command with subcommands
+    :param names: names of the command
+    :param description: command description
+    :param subcommands: list of (names, description) tuples of the subcommands
+    :return: help message
+    """
+    command_names = list(map(lambda x: "/{}".format(escape_for_markdown(x)), names))
+    synopsis = command_names[0]
+    if len(command_names) > 1:
+        synopsis += " ({})".format(", ".join(command_names[1:]))
+    if len(subcommands) > 0:
+        synopsis += " [[COMMAND]]"
+
+    lines = [synopsis]
+    if description is not None:
+        lines.append("  " + description)
+
+    if len(subcommands) > 0:
+        lines.append("Commands:")
+        for subcommand_names, subcommand_description in subcommands:
+            line = "  " + ", ".join(map(lambda x: "`{}`".format(x), subcommand_names))
+            if subcommand_description is not None:
+                line += "\t\t" + escape_for_markdown(subcommand_description)
+            lines.append(line)
+
+    return "\n".join(lines)
+
+
 def generate_synopsis(names: [str], args: List[Argument]) -> str:
     """
     Generates the synopsis for a command
@@ -110,14 +142,49 @@ def generate_argument_description(arg: Argument) -> str:
 
     message = "  " + ", ".join(arg_names)
     if not arg.flag:
-        message += "\t\t`{}`".format(arg.type.__name__.upper())
+        type_name = arg.type.__name__.upper()
+        if arg.nargs is not None:
+            type_name += "..."
+        message += "\t\t`{}`".format(type_name)
     message += "\t\t" + escape_for_markdown(arg.description)
 
+    if inspect.isclass(arg.type) and issubclass(arg.type, Enum):
+        member_names = list(map(lambda x: escape_for_markdown(x.lower()), arg.type.__members__.keys()))
+        message += " ({})".format(", ".join(member_names))
+
+    constraints = generate_constraints_description(arg)
+    if constraints is not None:
+        message += " [{}]".format(constraints)
+
     if arg.optional and not arg.flag:
-        message += "\t(`{}`)".format(escape_for_markdown(arg.default))
+        default = arg.default.name.lower() if isinstance(arg.default, Enum) else arg.default
+        message += "\t(`{}`)".format(escape_for_markdown(default))
     return message
 
 
+def generate_constraints_description(arg: Argument) -> str or None:
+    """
+    Generates a short description of the declarative constraints of an argument
+    :param arg: the argument
+    :return: constraints description, or None if the argument has no constraints
+    """
+    constraints = []
+    if arg.min is not None:
+        constraints.append("min: {}".format(escape_for_markdown(arg.min)))
+    if arg.max is not None:
+        constraints.append("max: {}".format(escape_for_markdown(arg.max)))
+    if arg.min_len is not None:
+        constraints.append("min length: {}".format(arg.min_len))
+    if arg.max_len is not None:
+        constraints.append("max length: {}".format(arg.max_len))
+    if arg.pattern is not None:
+        constraints.append("pattern: `{}`".format(arg.pattern.pattern))
+
+    if len(constraints) <= 0:
+        return None
+    return ", ".join(constraints)
+
+
 def generate_command_example(names: List[str], arguments: List[Argument], flags: List[Argument]) -> str:
     """
     Generates an example call of a command
@@ -0,0 +1,119 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+from typing import List
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from telegram_click import parser
+from telegram_click.parser import Token, iter_tokens, split_command_from_args, split_command_from_target, \
+    split_subcommand_from_args
+
+# name of the context attribute holding the ParsedMessage of the current update
+_CONTEXT_ATTRIBUTE = "_telegram_click_parsed_message"
+
+
+class ParsedMessage:
+    """
+    The command message of a single update, split up once and shared by
+    the command wrapper, error handlers and (optionally) the command callback.
+    """
+    __slots__ = ("message", "text", "command", "target", "args_text", "arguments", "errors", "limits", "_tokens")
+
+    def __init__(self, message: any, bot_username: str):
+        """
+        Splits up a command message
+        :param message: the message
+        :param bot_username: the username of this bot
+        """
+        self.message = message
+        self.text = message.text if message is not None else None
+        cmd, self.args_text = split_command_from_args(self.text)
+        command, self.target = split_command_from_target(bot_username, cmd)
+        # the command name, without the leading "/"
+        self.command = command[1:] if command is not None else None
+        # the parsed argument values of the command, keyed by argument name (None until parsed)
+        self.arguments = None
+        # exceptions raised while handling the message
+        self.errors = []
+        # the parse limits of the command handling the message, parser.DEFAULT_PARSE_LIMITS is used if None
+        self.limits = None
+        self._tokens = None
+
+    @property
+    def tokens(self) -> List[Token]:
+        """
+        Tokenizes the argument text on first access, within the parse limits of the command
+        :return: the tokens of the argument text, referencing spans of args_text,
+                 an empty list if the argument text can not be tokenized (f.ex. because of an unbalanced quote)
+        """
+        if self._tokens is None:
+            self._tokens = self._tokenize()
+        return self._tokens
+
+    def _tokenize(self) -> List[Token]:
+        """
+        :return: the tokens of the argument text, or an empty list
+        """
+        if not self.args_text:
+            return []
+
+        limits = self.limits if self.limits is not None else parser.DEFAULT_PARSE_LIMITS
+        if limits.max_length is not None and len(self.args_text) > limits.max_length:
+            return []
+        try:
+            return list(iter_tokens(self.args_text, limits.max_tokens, limits.max_keys))
+        except ValueError:
+            # unbalanced quotes (which are fine for free text) or exceeded limits
+            return []
+
+    def subcommand_args(self, depth: int) -> (List[str], str or None):
+        """
+        Splits subcommand names (of command groups) from the argument text
+        :param depth: the number of subcommand names to split
+        :return: (subcommand names, remaining argument text)
+        """
+        names = []
+        args_text = self.args_text
+        for _ in range(depth):
+            name, args_text = split_subcommand_from_args(args_text)
+            if name is not None:
+                names.append(name)
+        return names, args_text
+
+    def __repr__(self):
+        return "<{} command={} target={} args={}>".format(
+            self.__class__.__name__, self.command, self.target, self.args_text)
+
+
+def get_parsed_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> ParsedMessage:
+    """
+    Returns the ParsedMessage of an update, which is created once and cached on the context
+    :param update: message update
+    :param context: message context
+    :return: the parsed message
+    """
+    message = update.effective_message
+    parsed_message = getattr(context, _CONTEXT_ATTRIBUTE, None)
+    if parsed_message is None or parsed_message.message is not message:
+        parsed_message = ParsedMessage(message, context.bot.username)
+        setattr(context, _CONTEXT_ATTRIBUTE, parsed_message)
+    return parsed_message
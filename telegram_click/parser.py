@@ -17,129 +17,578 @@
 #  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
+import asyncio
 import logging
-from collections import OrderedDict
-from typing import List
+import re
+from concurrent.futures import Executor
+from types import MappingProxyType
+from typing import List, Iterator, Iterable
 
 from telegram_click.argument import Argument
+from telegram_click.cache import LRUCache
+from telegram_click.group import ArgumentGroup
+from telegram_click.util import PrefixTrie
 from telegram_click.const import *
 
 LOGGER = logging.getLogger(__name__)
 
 
-def parse_command_args(arguments: str or None, expected_args: List[Argument]) -> dict:
+def _quoted_pattern(quote_char: str) -> str:
+    """
+    :param quote_char: the quotation character
+    :return: a pattern matching a quoted text, including (escaped) quotation characters
+    """
+    quote = re.escape(quote_char)
+    escape = re.escape(ESCAPE_CHAR)
+    return "{q}[^{q}{e}]*(?:{e}.[^{q}{e}]*)*{q}".format(q=quote, e=escape)
+
+
+_SEPARATOR_CHARS = re.escape("".join(TOKEN_SEPARATOR_CHARS))
+# matches a token of a text that does not contain any quotation characters
+_UNQUOTED_TOKEN_PATTERN = re.compile("[^{}]+".format(_SEPARATOR_CHARS))
+# matches a single token (and the separators in front of it):
+# an unquoted part, optionally followed by a quoted part that ends the token
+_TOKEN_PATTERN = re.compile("[{s}]*([^{s}{q}]*)({quoted})?".format(
+    s=_SEPARATOR_CHARS,
+    q=re.escape("".join(QUOTE_CHARS)),
+    quoted="|".join(map(_quoted_pattern, QUOTE_CHARS))
+), re.DOTALL)
+_ESCAPE_SEQUENCE_PATTERN = re.compile("{}(.)".format(re.escape(ESCAPE_CHAR)), re.DOTALL)
+_WHITESPACE_RUN_PATTERN = re.compile(r"\s*")
+# characters a token has to start with to be an argument key
+_ARG_KEY_START_CHARS = frozenset(map(lambda x: x[0], ARG_NAMING_PREFIXES))
+
+
+class Token:
+    """
+    A single token of an argument text.
+    Tokens only reference their span within the original text, the actual text
+    is sliced out when it is needed.
+    """
+    __slots__ = ("source", "start", "end", "quote_start", "escaped", "quoted", "is_key")
+
+    def __init__(self, source: str, start: int, end: int, quote_start: int = -1, escaped: bool = False):
+        """
+        Creates a token
+        :param source: the original text
+        :param start: start index of the token within the original text
+        :param end: end index (exclusive) of the token within the original text
+        :param quote_start: index of the opening quotation character within the original text, -1 if there is none
+        :param escaped: whether the quoted part of the token contains escape characters
+        """
+        self.source = source
+        self.start = start
+        self.end = end
+        self.quote_start = quote_start
+        self.escaped = escaped
+        # whether the whole token is quoted
+        self.quoted = quote_start == start
+        # whether the token has the form of an argument key
+        self.is_key = not self.quoted and source[start] in _ARG_KEY_START_CHARS and is_argument_key(self.text)
+
+    @property
+    def text(self) -> str:
+        """
+        :return: the token, including quotation characters
+        """
+        if not self.escaped:
+            return self.source[self.start:self.end]
+        return self.source[self.start:self.quote_start] + _unescape(self.source[self.quote_start:self.end])
+
+    @property
+    def value(self) -> str:
+        """
+        :return: the token, without surrounding quotation characters
+        """
+        if not self.quoted:
+            return self.text
+        value = self.source[self.start + 1:self.end - 1]
+        return _unescape(value) if self.escaped else value
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return "<{} {}:{} {}>".format(self.__class__.__name__, self.start, self.end, self.text)
+
+
+class InputLimitExceeded(ValueError):
+    """
+    Raised when the argument text of a command exceeds one of its parse limits
+    """
+    pass
+
+
+class ParseLimits:
+    """
+    Upper bounds for the argument text of a command, to bound the work spent on abusive messages.
+    Any limit that is None is not enforced.
+    """
+    __slots__ = ("max_length", "max_tokens", "max_keys")
+
+    def __init__(self, max_length: int = None, max_tokens: int = None, max_keys: int = None):
+        """
+        Creates parse limits
+        :param max_length: the maximum length of the argument text
+        :param max_tokens: the maximum number of tokens within the argument text
+        :param max_keys: the maximum number of named argument keys (and flags) within the argument text
+        """
+        self.max_length = max_length
+        self.max_tokens = max_tokens
+        self.max_keys = max_keys
+
+
+# limits used for all commands that don't specify their own
+DEFAULT_PARSE_LIMITS = ParseLimits()
+
+
+class ParsePlan:
+    """
+    Immutable lookup structures needed to parse the arguments of a single command.
+    A plan is compiled once (when a command is decorated) and reused for every update.
+    """
+    __slots__ = ("arguments", "names", "name_index", "name_trie", "flag_chars", "positional", "remainder", "kwarg_names",
+                 "variadic", "async_arguments", "group_checks", "lazy", "cache", "limits", "executor")
+
+    def __init__(self, arguments: List[Argument], lazy: bool = False, cache: LRUCache = None,
+                 limits: ParseLimits = None, executor: Executor = None, groups: List[ArgumentGroup] = None):
+        """
+        Compiles a parse plan
+        :param arguments: the expected arguments of a command
+        :param lazy: whether to stop parsing as soon as all arguments are bound,
+                     ignoring the rest of the argument text (including named arguments)
+        :param cache: an optional cache for parse results, keyed by (plan, argument text),
+                      requires all arguments to be pure
+        :param limits: limits for the argument text, DEFAULT_PARSE_LIMITS is used if None
+        :param executor: an optional executor to run custom converters on, unless an argument specifies its own
+        :param groups: constraints on which arguments may be specified together
+        """
+        arguments = tuple(arguments)
+
+        if cache is not None:
+            impure = list(map(lambda x: x.name, filter(lambda x: not x.pure, arguments)))
+            if len(impure) > 0:
+                raise ValueError(
+                    "Parse results can only be cached if all arguments are pure! Impure arguments: {}".format(
+                        ", ".join(impure)))
+
+        # map argument name (and alias) -> argument index
+        name_index = {}
+        for idx, argument in enumerate(arguments):
+            for name in argument.names:
+                name_index[name] = idx
+
+        object.__setattr__(self, "arguments", arguments)
+        object.__setattr__(self, "names", tuple(map(lambda x: x.name, arguments)))
+        object.__setattr__(self, "name_index", MappingProxyType(name_index))
+        # used to resolve unambiguous abbreviations of argument names
+        object.__setattr__(self, "name_trie", PrefixTrie(name_index.items()))
+        # single character names that can be combined (f.ex. "-Syu")
+        object.__setattr__(self, "flag_chars", frozenset(
+            filter(lambda x: len(x) == 1 and arguments[name_index[x]].flag, name_index.keys())))
+        # index of the argument that takes the rest of the argument text, if any
+        object.__setattr__(self, "remainder", next(
+            filter(lambda x: arguments[x].remainder, range(len(arguments))), None))
+        # indexes of arguments that can be specified without a key, in order of declaration
+        object.__setattr__(self, "positional", tuple(
+            filter(lambda x: not arguments[x].flag and x != self.remainder, range(len(arguments)))))
+        # index of the argument that takes multiple values, if any
+        object.__setattr__(self, "variadic", next(
+            filter(lambda x: arguments[x].nargs is not None, range(len(arguments))), None))
+        # argument names converted to python param naming convention (snake-case)
+        object.__setattr__(self, "kwarg_names", tuple(
+            map(lambda x: x.name.lower().replace("-", "_"), arguments)))
+        # indexes of arguments that have to be converted asynchronously
+        # (async converter or validator, or a custom converter that is run on an executor)
+        object.__setattr__(self, "async_arguments", tuple(filter(
+            lambda x: arguments[x].is_async or (not arguments[x].builtin_converter and (
+                    arguments[x].executor is not None or executor is not None)),
+            range(len(arguments)))))
+        # checks of the argument groups, on a bitmask of the indexes of specified arguments
+        object.__setattr__(self, "group_checks", tuple(
+            map(lambda x: x.compile(name_index), groups if groups is not None else [])))
+        object.__setattr__(self, "lazy", lazy)
+        object.__setattr__(self, "cache", cache)
+        object.__setattr__(self, "limits", limits)
+        object.__setattr__(self, "executor", executor)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("{} is immutable".format(self.__class__.__name__))
+
+    def __delattr__(self, key):
+        raise AttributeError("{} is immutable".format(self.__class__.__name__))
+
+
+def _as_parse_plan(expected_args: List[Argument] or ParsePlan) -> ParsePlan:
+    """
+    :param expected_args: a list of expected arguments or an already compiled parse plan
+    :return: a parse plan for the given arguments
+    """
+    if isinstance(expected_args, ParsePlan):
+        return expected_args
+    return ParsePlan(expected_args)
+
+
+def parse_command_args(arguments: str or None, expected_args: List[Argument] or ParsePlan) -> dict:
     """
     Parses the given argument text
     :param arguments: the argument text
-    :param expected_args: a list of expected arguments
+    :param expected_args: a list of expected arguments, or a parse plan compiled from them
+    :return: dictionary { argument-name -> value }
+    """
+    plan = _as_parse_plan(expected_args)
+    values = _parse_argument_values(arguments, plan)
+    return dict(zip(plan.names, values))
+
+
+async def parse_command_args_async(arguments: str or None, expected_args: List[Argument] or ParsePlan) -> dict:
+    """
+    Parses the given argument text, supporting async converters and validators
+    :param arguments: the argument text
+    :param expected_args: a list of expected arguments, or a parse plan compiled from them
     :return: dictionary { argument-name -> value }
     """
+    plan = _as_parse_plan(expected_args)
+    values = await _parse_argument_values_async(arguments, plan)
+    return dict(zip(plan.names, values))
+
+
+class _ScratchBuffers:
+    """
+    Working memory for parsing the arguments of a single command, that can be reused between parse runs
+    """
+    __slots__ = ("bound", "positional_tokens", "_unbound")
+
+    def __init__(self, size: int):
+        """
+        :param size: the number of arguments of the command
+        """
+        self._unbound = [False] * size
+        self.bound = list(self._unbound)
+        self.positional_tokens = []
+
+    def reset(self):
+        """
+        Prepares the buffers for the next parse run
+        """
+        self.bound[:] = self._unbound
+        self.positional_tokens.clear()
+
+
+def _parse_argument_values(arguments: str or None, plan: ParsePlan, scratch: _ScratchBuffers = None) -> list:
+    """
+    Parses the given argument text, using the cache of the parse plan (if any)
+    :param arguments: the argument text
+    :param plan: the parse plan of the command
+    :param scratch: optional buffers to reuse
+    :return: list of parsed values, in the order of the arguments of the plan
+    """
+    arguments = check_argument_text(arguments, plan)
+
+    if plan.cache is None:
+        return _convert_argument_values(plan, _bind_argument_values(arguments, plan, scratch))
+
+    key = (plan, arguments)
+    values = plan.cache.get(key)
+    if values is None:
+        values = tuple(_convert_argument_values(plan, _bind_argument_values(arguments, plan, scratch)))
+        plan.cache.put(key, values)
+    return list(values)
+
+
+async def _parse_argument_values_async(arguments: str or None, plan: ParsePlan) -> list:
+    """
+    Parses the given argument text, awaiting async converters and validators concurrently
+    :param arguments: the argument text
+    :param plan: the parse plan of the command
+    :return: list of parsed values, in the order of the arguments of the plan
+    """
+    if len(plan.async_arguments) <= 0:
+        return _parse_argument_values(arguments, plan)
+
+    arguments = check_argument_text(arguments, plan)
+
+    if plan.cache is None:
+        return await _convert_argument_values_async(plan, _bind_argument_values(arguments, plan))
+
+    key = (plan, arguments)
+    values = plan.cache.get(key)
+    if values is None:
+        values = tuple(await _convert_argument_values_async(plan, _bind_argument_values(arguments, plan)))
+        plan.cache.put(key, values)
+    return list(values)
+
+
+def check_argument_text(arguments: str or None, plan: ParsePlan) -> str:
+    """
+    Checks the length of the argument text
+    :param arguments: the argument text
+    :param plan: the parse plan of the command
+    :return: the argument text
+    """
     if arguments is None:
-        arguments = ""
+        return ""
 
-    tokens = split_into_tokens(arguments)
+    limits = plan.limits if plan.limits is not None else DEFAULT_PARSE_LIMITS
+    if limits.max_length is not None and len(arguments) > limits.max_length:
+        raise InputLimitExceeded("Argument text too long (limit: {} characters)".format(limits.max_length))
+    return arguments
 
-    # map argument.name -> argument
-    arg_name_map = OrderedDict()
-    for expected_arg in expected_args:
-        for name in expected_arg.names:
-            arg_name_map[name] = expected_arg
 
-    parsed_args = {}
+def _convert_argument_values(plan: ParsePlan, raw_values: List[str or None]) -> list:
+    """
+    Converts and validates the bound argument values
+    :param plan: the parse plan of the command
+    :param raw_values: the bound string values, None for unbound arguments
+    :return: list of parsed values, in the order of the arguments of the plan
+    """
+    return list(map(lambda x: x[0].parse_arg_value(x[1]), zip(plan.arguments, raw_values)))
 
-    named_arg_idx = []
-    for idx, arg_key in enumerate(tokens):
-        if is_argument_key(arg_key):
-            named_arg_idx.append(idx)
 
-    # process named arguments (and flags) first
-    used_idx = list(named_arg_idx)
-    for idx in named_arg_idx:
-        arg_key = tokens[idx]
+async def _convert_argument_values_async(plan: ParsePlan, raw_values: List[str or None]) -> list:
+    """
+    Converts and validates the bound argument values.
+    Async converters and validators (and converters that run on an executor) of multiple arguments
+    are awaited concurrently, the first failure cancels all others.
+    :param plan: the parse plan of the command
+    :param raw_values: the bound string values, None for unbound arguments
+    :return: list of parsed values, in the order of the arguments of the plan
+    """
+    expected_args = plan.arguments
+    values = [None] * len(expected_args)
+
+    # process synchronous arguments first, to fail before starting any async work.
+    # a required variadic argument taking any number of values is converted even if no value is given
+    pending = list(filter(
+        lambda x: raw_values[x] is not None or (expected_args[x].nargs == NARGS_ANY and not expected_args[x].optional),
+        plan.async_arguments))
+    for idx, arg in enumerate(expected_args):
+        if idx not in pending:
+            values[idx] = arg.parse_arg_value(raw_values[idx])
+
+    if len(pending) == 1:
+        idx = pending[0]
+        values[idx] = await expected_args[idx].parse_arg_value_async(raw_values[idx], plan.executor)
+    elif len(pending) > 1:
+        tasks = list(map(
+            lambda x: asyncio.ensure_future(expected_args[x].parse_arg_value_async(raw_values[x], plan.executor)),
+            pending))
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        for idx, value in zip(pending, results):
+            values[idx] = value
+
+    return values
+
+
+def _bind_argument_values(arguments: str, plan: ParsePlan, scratch: _ScratchBuffers = None) -> List[str or None]:
+    """
+    Binds the tokens of the given argument text to the arguments of a command, without converting them
+    :param arguments: the argument text
+    :param plan: the parse plan of the command
+    :param scratch: optional buffers to reuse
+    :return: list of bound string values (a list of string values for variadic arguments),
+             in the order of the arguments of the plan, None for unbound arguments
+    """
+    expected_args = plan.arguments
+    name_index = plan.name_index
+    raw_values = [None] * len(expected_args)
+
+    if scratch is None:
+        scratch = _ScratchBuffers(len(expected_args))
+    else:
+        scratch.reset()
+    bound = scratch.bound
+
+    # non-flag arguments that have not been bound by name yet
+    unbound_positional = len(plan.positional)
+    unbound_flags = len(expected_args) - unbound_positional - (plan.remainder is not None)
+    # tokens not used by named arguments, in order of occurrence
+    positional_tokens = scratch.positional_tokens
+    # start index of the text that is bound to the remainder argument
+    remainder_start = None
+    # index of the variadic argument that takes the following values, after it has been specified by name
+    collecting = None
+
+    # named arguments (and flags) are bound as soon as they occur,
+    # positional arguments are bound to the remaining tokens afterwards
+    limits = plan.limits if plan.limits is not None else DEFAULT_PARSE_LIMITS
+    tokens = iter_tokens(arguments, limits.max_tokens, limits.max_keys)
+    pos = 0
+    while True:
+        if plan.remainder is not None and not bound[plan.remainder] and len(positional_tokens) >= unbound_positional:
+            # all preceding arguments are bound, only keys of unbound arguments are tokenized from here on
+            pos = _WHITESPACE_RUN_PATTERN.match(arguments, pos).end()
+            if pos >= len(arguments) or arguments[pos] not in _ARG_KEY_START_CHARS:
+                remainder_start = pos
+                break
+            try:
+                token = next(tokens, None)
+            except InputLimitExceeded:
+                raise
+            except ValueError:
+                # an unbalanced quote is simply part of the remainder
+                token = None
+            if token is None or not token.is_key or not _is_bindable_key(plan, bound, token):
+                remainder_start = pos
+                break
+        elif plan.lazy and unbound_flags <= 0 and len(positional_tokens) >= unbound_positional and (
+                collecting is None and (plan.variadic is None or bound[plan.variadic])):
+            break
+        else:
+            token = next(tokens, None)
+            if token is None:
+                break
+        pos = token.end
+
+        if not token.is_key:
+            if collecting is not None:
+                values = raw_values[collecting]
+                values.append(token.value)
+                if len(values) == expected_args[collecting].nargs:
+                    collecting = None
+            else:
+                positional_tokens.append(token)
+            continue
+
+        collecting = None
+        arg_key = token.text
         arg_name = remove_naming_prefix(arg_key)
         value = None
 
         if ARG_VALUE_SEPARATOR_CHAR in arg_name:
             arg_name, value = arg_name.split(ARG_VALUE_SEPARATOR_CHAR, 1)
 
-        if arg_name not in arg_name_map:
+        arg_idx = name_index.get(arg_name)
+        if arg_idx is None or bound[arg_idx]:
             # check if all individual characters could be used as flags
-            all_flags = True
-            for char in arg_name:
-                if not (char in arg_name_map.keys() and arg_name_map[char].flag):
-                    all_flags = False
-                    break
-
-            if all_flags:
+            if all(map(lambda x: x in plan.flag_chars and not bound[name_index[x]], arg_name)):
                 if value is not None:
                     raise ValueError("Unexpected flag value: {}".format(arg_key))
+                if len(set(arg_name)) != len(arg_name):
+                    raise ValueError("Flag specified multiple times: {}".format(arg_key))
 
                 # process characters as flags
                 for char in arg_name:
-                    arg = arg_name_map[char]
+                    flag_idx = name_index[char]
                     # if a flag is present, we assume the value "true"
-                    value = arg.parse_arg_value("True")
-
-                    parsed_args[arg.name] = arg.parse_arg_value(value)
-                    for name in arg.names:
-                        arg_name_map.pop(name)
+                    raw_values[flag_idx] = "True"
+                    bound[flag_idx] = True
+                    unbound_flags -= 1
                 continue
-            else:
-                # otherwise raise an error
+
+            # otherwise the key has to be an unambiguous abbreviation of a long argument name
+            arg_idx = _resolve_name_prefix(plan, arg_key, arg_name)
+            if bound[arg_idx]:
                 raise ValueError("Unknown argument '{}'".format(arg_key))
-        arg = arg_name_map[arg_name]
+        arg = expected_args[arg_idx]
 
         if arg.flag:
             if value is not None:
                 raise ValueError("Unexpected flag value: {}".format(arg_key))
             # if a flag is present, we assume the value "true"
-            value = arg.parse_arg_value("True")
+            value = "True"
+            unbound_flags -= 1
+        elif arg.nargs is not None:
+            # the values of a variadic argument are the following tokens, up to the next key
+            if value is not None:
+                if is_quoted(value):
+                    value = value[1:-1]
+                value = [value]
+            else:
+                value = []
+            if len(value) != arg.nargs:
+                collecting = arg_idx
+            unbound_positional -= 1
+        elif arg_idx == plan.remainder:
+            # the remainder is the rest of the original text following the key, without tokenization
+            if value is not None:
+                value_start = arguments.index(ARG_VALUE_SEPARATOR_CHAR, token.start) + 1
+            else:
+                value_start = _WHITESPACE_RUN_PATTERN.match(arguments, token.end).end()
+            value = arguments[value_start:].rstrip()
+            if len(value) <= 0:
+                raise ValueError("Expected argument value for '{}' but found EOL".format(arg_key))
+            raw_values[arg_idx] = value
+            bound[arg_idx] = True
+            break
         else:
-            if ARG_VALUE_SEPARATOR_CHAR not in arg_key:
-                next_idx = idx + 1
-                value = tokens[next_idx] if next_idx < len(tokens) else None
-                used_idx.append(next_idx)
-
             if value is None:
-                raise ValueError(
-                    "Expected argument value for '{}' but found EOL".format(arg_key))
-            if is_argument_key(value):
-                raise ValueError(
-                    "Expected argument value for '{}' but found named argument '{}'".format(arg_key, value))
+                value_token = next(tokens, None)
+                if value_token is None:
+                    raise ValueError(
+                        "Expected argument value for '{}' but found EOL".format(arg_key))
+                if value_token.is_key:
+                    raise ValueError(
+                        "Expected argument value for '{}' but found named argument '{}'".format(arg_key, value_token))
+                value = value_token.value
+                pos = value_token.end
+            else:
+                # value specified using the separator character
+                if is_argument_key(value):
+                    raise ValueError(
+                        "Expected argument value for '{}' but found named argument '{}'".format(arg_key, value))
+                if is_quoted(value):
+                    value = value[1:-1]
+            if arg_idx != plan.remainder:
+                unbound_positional -= 1
+
+        raw_values[arg_idx] = value
+        bound[arg_idx] = True
+
+    # then process positional arguments,
+    # using a single cursor over the positional arguments that skips those bound by name.
+    # flags are never positional, to prevent accidentally setting a flag value
+    positional = plan.positional
+    cursor = 0
+    for token_idx, token in enumerate(positional_tokens):
+        while cursor < len(positional) and bound[positional[cursor]]:
+            cursor += 1
+        if cursor >= len(positional):
+            # ignore excess arguments
+            break
 
-        if is_quoted(value):
-            value = value[1:-1]
+        arg_idx = positional[cursor]
+        if arg_idx == plan.variadic:
+            # the variadic argument is the last positional one and takes all remaining tokens
+            nargs = expected_args[arg_idx].nargs
+            values = positional_tokens[token_idx:]
+            if isinstance(nargs, int):
+                values = values[:nargs]
+            raw_values[arg_idx] = list(map(lambda x: x.value, values))
+            bound[arg_idx] = True
+            break
 
-        parsed_args[arg.name] = arg.parse_arg_value(value)
-        for name in arg.names:
-            arg_name_map.pop(name)
+        raw_values[arg_idx] = token.value
+        bound[arg_idx] = True
+        cursor += 1
 
-    # then process positional arguments
-    remaining_idx = list(set(list(range(len(tokens)))) - set(used_idx))
-    for idx in sorted(remaining_idx):
-        if len(arg_name_map) <= 0:
-            # ignore excess arguments
-            break
+    if remainder_start is not None and remainder_start < len(arguments):
+        # the remainder is taken from the original text, without tokenization
+        raw_values[plan.remainder] = arguments[remainder_start:].rstrip()
 
-        arg_key = tokens[idx]
-        if is_quoted(arg_key):
-            arg_key = arg_key[1:-1]
-        arg = list(arg_name_map.values())[0]
-        # ignore flags here, to prevent accidentally setting a flag value
-        if arg.flag:
-            continue
-        parsed_args[arg.name] = arg.parse_arg_value(arg_key)
-        for name in arg.names:
-            arg_name_map.pop(name)
+    if len(plan.group_checks) > 0:
+        _check_argument_groups(plan, raw_values)
 
-    # and then handle missing args
-    while len(arg_name_map) > 0:
-        name, arg = arg_name_map.popitem()
-        parsed_args[arg.name] = arg.parse_arg_value(None)
-        for name in list(filter(lambda x: x != name, arg.names)):
-            arg_name_map.pop(name)
+    return raw_values
 
-    return parsed_args
+
+def _check_argument_groups(plan: ParsePlan, raw_values: List[str or None]):
+    """
+    Checks the argument groups of a command, before any value is converted
+    :param plan: the parse plan of the command
+    :param raw_values: the bound string values, None for unbound arguments
+    """
+    mask = 0
+    for idx, value in enumerate(raw_values):
+        if value is not None:
+            mask |= 1 << idx
+    for check in plan.group_checks:
+        check(mask)
 
 
 def split_into_tokens(text: str) -> List[str]:
@@ -150,61 +599,142 @@ def split_into_tokens(text: str) -> List[str]:
     :param text: the text to tokenize
     :return: a lists of tokens
     """
-    text = text.strip()
+    return list(map(lambda x: x.text, tokenize(text)))
 
-    tokens = []
-    if len(text) <= 0:
-        return tokens
 
-    escape_flag = False
-    start_quote_char = None
-    in_quote = False
+def _is_bindable_key(plan: ParsePlan, bound: List[bool], token: Token) -> bool:
+    """
+    Checks if the given argument key token refers to arguments that are still unbound
+    :param plan: the parse plan of the command
+    :param bound: flags indicating which arguments are already bound
+    :param token: the argument key token
+    :return: True if the key can be bound, False otherwise
+    """
+    arg_key = token.text
+    arg_name = remove_naming_prefix(arg_key).split(ARG_VALUE_SEPARATOR_CHAR, 1)[0]
+    arg_idx = plan.name_index.get(arg_name)
+    if arg_idx is not None:
+        return not bound[arg_idx]
+    if len(arg_name) > 0 and all(map(lambda x: x in plan.flag_chars and not bound[plan.name_index[x]], arg_name)):
+        return True
+    if len(arg_name) > 0 and starts_with_naming_prefix(arg_key, abbreviated=False):
+        arg_idx = plan.name_trie.get_unique(arg_name)
+        return arg_idx is not None and not bound[arg_idx]
+    return False
 
-    current_token = ""
-    for idx, character in enumerate(text):
-        if in_quote and escape_flag:
-            current_token = current_token + character
-            escape_flag = False
-            continue
 
-        if character == '\\' and not escape_flag and in_quote:
-            escape_flag = True
-            continue
+def _resolve_name_prefix(plan: ParsePlan, arg_key: str, arg_name: str) -> int:
+    """
+    Resolves an abbreviated long argument key (f.ex. "--verb" for "--verbose")
+    :param plan: the parse plan of the command
+    :param arg_key: the argument key, including its prefix
+    :param arg_name: the argument name (or name prefix) specified by the key
+    :return: the index of the only argument that has a name starting with the given prefix
+    """
+    if len(arg_name) <= 0 or not starts_with_naming_prefix(arg_key, abbreviated=False):
+        raise ValueError("Unknown argument '{}'".format(arg_key))
 
-        # check for spaces
-        if character in [" ", "\t"]:
-            if not in_quote:
-                # we have a space while not quoting, this means the current token has ended
-                # or we can simply ignore it
-                if len(current_token) > 0:
-                    tokens.append(current_token)
-                    current_token = ""
-                continue
+    arg_idx = plan.name_trie.get_unique(arg_name)
+    if arg_idx is not None:
+        return arg_idx
 
-        if character in QUOTE_CHARS:
-            if in_quote:
-                if character == start_quote_char:
-                    # the quote has ended and therefore the token
-                    in_quote = False
-                    current_token = current_token + character
-                    if len(current_token) > 0:
-                        tokens.append(current_token)
-                    current_token = ""
-                    continue
-            else:
-                # start a quote
-                in_quote = True
-                start_quote_char = character
+    candidates = plan.name_trie.keys_with_prefix(arg_name)
+    if len(candidates) > 0:
+        # list candidates using the prefix the user typed
+        arg_prefix = next(filter(arg_key.startswith, LONG_ARG_KEY_PREFIXES))
+        raise ValueError("Ambiguous argument '{}', could be any of: {}".format(
+            arg_key, ", ".join(map(lambda x: "{}{}".format(arg_prefix, x), candidates))))
+    raise ValueError("Unknown argument '{}'".format(arg_key))
+
+
+def tokenize(text: str) -> List[Token]:
+    """
+    Splits the given text into tokens, following the rules of split_into_tokens
+    :param text: the text to tokenize
+    :return: a list of tokens, referencing spans of the given text
+    """
+    return list(iter_tokens(text))
 
-        current_token = current_token + character
 
-    if in_quote:
-        raise ValueError("Missing closing quotation character: {}".format(start_quote_char))
+def iter_tokens(text: str, max_tokens: int = None, max_keys: int = None) -> Iterator[Token]:
+    """
+    Lazily splits the given text into tokens, following the rules of split_into_tokens.
+    Each token is matched within the original text in a single step,
+    so the runtime is linear in the length of the consumed part of the text.
+    :param text: the text to tokenize
+    :param max_tokens: the maximum number of tokens, tokenization is aborted as soon as it is exceeded
+    :param max_keys: the maximum number of argument key tokens, tokenization is aborted as soon as it is exceeded
+    :return: a generator of tokens, referencing spans of the given text
+    """
+    tokens = _iter_tokens(text)
+    if max_tokens is None and max_keys is None:
+        return tokens
+    return _limit_tokens(tokens, max_tokens, max_keys)
 
-    if len(current_token) > 0:
-        tokens.append(current_token)
 
-    return tokens
+def _limit_tokens(tokens: Iterator[Token], max_tokens: int or None, max_keys: int or None) -> Iterator[Token]:
+    """
+    Passes through the given tokens until a limit is exceeded
+    :param tokens: the tokens
+    :param max_tokens: the maximum number of tokens
+    :param max_keys: the maximum number of argument key tokens
+    :return: a generator of tokens
+    """
+    token_count = 0
+    key_count = 0
+    for token in tokens:
+        token_count += 1
+        if max_tokens is not None and token_count > max_tokens:
+            raise InputLimitExceeded("Too many arguments (limit: {})".format(max_tokens))
+        if token.is_key:
+            key_count += 1
+            if max_keys is not None and key_count > max_keys:
+                raise InputLimitExceeded("Too many named arguments (limit: {})".format(max_keys))
+        yield token
+
+
+def _iter_tokens(text: str) -> Iterator[Token]:
+    """
+    Lazily splits the given text into tokens
+    :param text: the text to tokenize
+    :return: a generator of tokens, referencing spans of the given text
+    """
+    # find the bounds of the text without surrounding whitespace, without copying the text
+    pos = _WHITESPACE_RUN_PATTERN.match(text).end()
+    length = len(text)
+    while length > pos and text[length - 1].isspace():
+        length -= 1
+    if pos >= length:
+        return
+
+    if not any(map(text.__contains__, QUOTE_CHARS)):
+        # without quotes every separator ends a token
+        for match in _UNQUOTED_TOKEN_PATTERN.finditer(text, pos, length):
+            yield Token(text, match.start(), match.end())
+        return
+
+    while True:
+        match = _TOKEN_PATTERN.match(text, pos, length)
+        start = match.start(1)
+        pos = match.end()
+        if start >= pos:
+            if pos < length:
+                # the only thing that can stop a token here is a quote without a closing counterpart
+                raise ValueError("Missing closing quotation character: {}".format(text[pos]))
+            return
+
+        quote_start = match.start(2)
+        escaped = quote_start >= 0 and text.find(ESCAPE_CHAR, quote_start, pos) >= 0
+        yield Token(text, start, pos, quote_start, escaped)
+
+
+def _unescape(text: str) -> str:
+    """
+    Removes escape characters from the given text
+    :param text: the (quoted) text
+    :return: the text without escape characters
+    """
+    return _ESCAPE_SEQUENCE_PATTERN.sub(r"\1", text)
 
 
 def split_command_from_args(text: str or None) -> (str or None, str or None):
@@ -222,6 +752,23 @@ def split_command_from_args(text: str or None) -> (str or None, str or None):
         return text, None
 
 
+def split_subcommand_from_args(text: str or None) -> (str or None, str or None):
+    """
+    Splits the first token (a subcommand name) from the argument text of a command
+    :param text: the argument text
+    :return: (subcommand, args)
+    """
+    if text is None:
+        return None, None
+
+    parts = text.split(None, 1)
+    if len(parts) <= 0:
+        return None, None
+    if len(parts) == 1:
+        return parts[0], None
+    return parts[0], parts[1]
+
+
 def split_command_from_target(bot_username: str, command: str or None) -> (str, str):
     """
     Determines the command target bot username
@@ -240,12 +787,12 @@ def split_command_from_target(bot_username: str, command: str or None) -> (str,
     return command, target
 
 
-def parse_telegram_command(bot_username: str, text: str, expected_args: []) -> (str, str, [str]):
+def parse_telegram_command(bot_username: str, text: str, expected_args: [] or ParsePlan) -> (str, str, [str]):
     """
     Parses the given message to a command and its arguments
     :param bot_username: the username of the current bot
     :param text: the text to parse
-    :param expected_args: expected arguments
+    :param expected_args: expected arguments, or a parse plan compiled from them
     :return: the target bot username, command, and its argument list
     """
     command, args = split_command_from_args(text)
@@ -254,6 +801,51 @@ def parse_telegram_command(bot_username: str, text: str, expected_args: []) -> (
     return command[1:], parsed_args
 
 
+async def parse_telegram_command_async(bot_username: str, text: str,
+                                       expected_args: [] or ParsePlan) -> (str, str, [str]):
+    """
+    Parses the given message to a command and its arguments, supporting async converters and validators
+    :param bot_username: the username of the current bot
+    :param text: the text to parse
+    :param expected_args: expected arguments, or a parse plan compiled from them
+    :return: the target bot username, command, and its argument list
+    """
+    command, args = split_command_from_args(text)
+    command, _ = split_command_from_target(bot_username, command)
+    parsed_args = await parse_command_args_async(args, expected_args)
+    return command[1:], parsed_args
+
+
+def parse_many(bot_username: str, texts: Iterable[str], expected_args: [] or ParsePlan) -> List[tuple]:
+    """
+    Parses a batch of messages for the same command (f.ex. when catching up on pending updates after downtime),
+    reusing the same parse plan and working memory for all of them
+    :param bot_username: the username of the current bot
+    :param texts: the texts to parse
+    :param expected_args: expected arguments, or a parse plan compiled from them
+    :return: a (command, parsed arguments, None) tuple for each text that was parsed successfully,
+             or a (command, None, exception) tuple for each text that could not be parsed
+    """
+    plan = _as_parse_plan(expected_args)
+    scratch = _ScratchBuffers(len(plan.arguments))
+
+    results = []
+    for text in texts:
+        command, args = split_command_from_args(text)
+        command, _ = split_command_from_target(bot_username, command)
+        if command is not None:
+            command = command[1:]
+
+        try:
+            values = _parse_argument_values(args, plan, scratch)
+        except Exception as ex:
+            results.append((command, None, ex))
+            continue
+        results.append((command, dict(zip(plan.names, values)), None))
+
+    return results
+
+
 def is_argument_key(text: str, abbreviated: bool or None = None) -> bool:
     """
     Checks is a text has the form of an argument key
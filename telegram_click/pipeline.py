@@ -0,0 +1,269 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import logging
+from typing import List
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from telegram_click import CommandTarget
+from telegram_click.error_handler import ErrorHandler, handle_error
+from telegram_click.message import ParsedMessage, get_parsed_message
+from telegram_click.parser import ParsePlan, check_argument_text, parse_command_args_async
+from telegram_click.permission.base import Permission
+from telegram_click.ratelimit import RateLimit
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Stage:
+    """
+    Names of the stages an update passes before the callback of a command is called
+    """
+    # command target (/command@target) filter
+    TARGET = "target"
+    # length limit of the argument text
+    LENGTH = "length"
+    # rate limit of the command
+    RATE_LIMIT = "rate_limit"
+    # permission checks, which may require network requests (f.ex. GROUP_ADMIN)
+    PERMISSIONS = "permissions"
+    # argument parsing and conversion
+    PARSE = "parse"
+
+
+# cheap local checks first, so updates that are dropped anyway never cause network requests
+DEFAULT_STAGES = [Stage.TARGET, Stage.LENGTH, Stage.RATE_LIMIT, Stage.PERMISSIONS, Stage.PARSE]
+
+
+async def filter_command_target(target: str or None, bot_username: str, allowed_targets: bytes):
+    """
+    Checks if the command target should be accepted based on given input
+    :param target: the target of the command or None
+    :param bot_username: the username of this bot
+    :param allowed_targets: the allowed command target bitmask
+    :return: True if allowed, False if not
+    """
+    if target is None:
+        expected = CommandTarget.UNSPECIFIED
+    elif target == bot_username:
+        expected = CommandTarget.SELF
+    else:
+        expected = CommandTarget.OTHER
+
+    return expected & allowed_targets == expected
+
+
+async def check_permissions(update: Update, context: ContextTypes.DEFAULT_TYPE,
+                            permissions: Permission) -> bool:
+    """
+    Checks if a message passes permission tests
+    :param update: message update
+    :param context: message context
+    :param permissions: command permissions
+    :return: True if authorized, False otherwise
+    """
+    if permissions is not None:
+        return await permissions.evaluate(update, context)
+    else:
+        return True
+
+
+class _PipelineState:
+    """
+    Intermediate results of a single update passing a pipeline
+    """
+    __slots__ = ("parsed_message", "args_text")
+
+    def __init__(self, parsed_message: ParsedMessage, args_text: str or None):
+        self.parsed_message = parsed_message
+        # the argument text, without subcommand names
+        self.args_text = args_text
+
+
+class CommandPipeline:
+    """
+    The ordered stages an update has to pass before the callback of a command is called.
+    Stages a command doesn't use (f.ex. the permission check of a command without permissions) are skipped.
+    Keeps track of how many updates were dropped by each stage.
+    """
+
+    def __init__(self, help_message: str, parse_plan: ParsePlan, permissions: Permission or None,
+                 command_target: bytes, error_handlers: List[ErrorHandler], rate_limit: RateLimit = None,
+                 stages: List[str] = None, subcommand_depth: int = 0):
+        """
+        Creates a pipeline
+        :param help_message: command help message
+        :param parse_plan: parse plan compiled from the command arguments
+        :param permissions: command permissions
+        :param command_target: command target
+        :param error_handlers: list of error handlers
+        :param rate_limit: an optional rate limit
+        :param stages: the names of the stages to run, in order, DEFAULT_STAGES is used if None
+        :param subcommand_depth: the number of subcommand names preceding the arguments
+        """
+        stage_functions = {
+            Stage.TARGET: self._filter_target,
+            Stage.LENGTH: self._check_length,
+            Stage.RATE_LIMIT: self._check_rate_limit,
+            Stage.PERMISSIONS: self._check_permissions,
+            Stage.PARSE: self._parse,
+        }
+
+        if stages is None:
+            stages = DEFAULT_STAGES
+        unknown = list(filter(lambda x: x not in stage_functions, stages))
+        if len(unknown) > 0:
+            raise ValueError("Unknown stages: {}".format(", ".join(unknown)))
+        if len(set(stages)) != len(stages):
+            raise ValueError("Stages must be unique: {}".format(", ".join(stages)))
+        if Stage.PARSE not in stages:
+            raise ValueError("Stages must include the '{}' stage".format(Stage.PARSE))
+
+        self.help_message = help_message
+        self.parse_plan = parse_plan
+        self.permissions = permissions
+        self.command_target = command_target
+        self.error_handlers = error_handlers
+        self.rate_limit = rate_limit
+        self.subcommand_depth = subcommand_depth
+        self.stages = list(stages)
+        # map stage name -> number of updates dropped by the stage
+        self.dropped = dict.fromkeys(self.stages, 0)
+
+        # skip stages that can't drop anything for this command
+        unused = set()
+        if command_target & CommandTarget.ANY == CommandTarget.ANY:
+            unused.add(Stage.TARGET)
+        # without limits of its own, the command uses parser.DEFAULT_PARSE_LIMITS, which may change at any time
+        if parse_plan.limits is not None and parse_plan.limits.max_length is None:
+            unused.add(Stage.LENGTH)
+        if rate_limit is None:
+            unused.add(Stage.RATE_LIMIT)
+        if permissions is None:
+            unused.add(Stage.PERMISSIONS)
+        if len(parse_plan.arguments) <= 0:
+            stage_functions[Stage.PARSE] = self._parse_without_arguments
+
+        # the names of the stages that are actually run
+        self.active_stages = list(filter(lambda x: x not in unused, self.stages))
+        self._stages = tuple(map(lambda x: (x, stage_functions[x]), self.active_stages))
+
+    async def run(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                  parsed_message: ParsedMessage = None) -> dict or None:
+        """
+        Passes an update through all stages
+        :param update: message update
+        :param context: message context
+        :param parsed_message: the parsed message of the update, taken from the context if None
+        :return: the parsed arguments, or None if the update was dropped
+        """
+        if parsed_message is None:
+            parsed_message = get_parsed_message(update, context)
+        parsed_message.limits = self.parse_plan.limits
+        if self.subcommand_depth > 0:
+            _, args_text = parsed_message.subcommand_args(self.subcommand_depth)
+        else:
+            args_text = parsed_message.args_text
+
+        state = _PipelineState(parsed_message, args_text)
+        for name, stage in self._stages:
+            if not await stage(update, context, state):
+                self.dropped[name] += 1
+                return None
+        return parsed_message.arguments
+
+    async def _filter_target(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                             state: _PipelineState) -> bool:
+        target = state.parsed_message.target
+        if await filter_command_target(target, context.bot.username, self.command_target):
+            return True
+
+        message = update.effective_message
+        LOGGER.debug("Ignoring command for unspecified target {} in chat {} for user {}: {}".format(
+            target,
+            message.chat_id,
+            message.from_user.id,
+            message))
+        return False
+
+    async def _check_length(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                            state: _PipelineState) -> bool:
+        try:
+            check_argument_text(state.args_text, self.parse_plan)
+            return True
+        except ValueError as ex:
+            await self._on_validation_error(update, context, state, ex)
+            return False
+
+    async def _check_rate_limit(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                state: _PipelineState) -> bool:
+        if self.rate_limit is None or self.rate_limit.try_acquire(update):
+            return True
+
+        message = update.effective_message
+        LOGGER.debug("Rate limit exceeded in chat {} for user {}: {}".format(
+            message.chat_id,
+            message.from_user.id,
+            message))
+
+        await handle_error(self.error_handlers, "on_rate_limit_error", update, context, self.rate_limit,
+                           parsed_message=state.parsed_message)
+        return False
+
+    async def _check_permissions(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                 state: _PipelineState) -> bool:
+        if await check_permissions(update, context, self.permissions):
+            return True
+
+        message = update.effective_message
+        LOGGER.debug("Permission denied in chat {} for user {} for message: {}".format(
+            message.chat_id,
+            message.from_user.id,
+            message))
+
+        await handle_error(self.error_handlers, "on_permission_error", update, context, self.permissions,
+                           parsed_message=state.parsed_message)
+        return False
+
+    async def _parse(self, update: Update, context: ContextTypes.DEFAULT_TYPE, state: _PipelineState) -> bool:
+        try:
+            state.parsed_message.arguments = await parse_command_args_async(state.args_text, self.parse_plan)
+            return True
+        except ValueError as ex:
+            # error during argument parsing
+            logging.exception("Error parsing command arguments")
+            await self._on_validation_error(update, context, state, ex)
+            return False
+
+    async def _parse_without_arguments(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                       state: _PipelineState) -> bool:
+        if not state.args_text:
+            # nothing to parse
+            state.parsed_message.arguments = {}
+            return True
+        return await self._parse(update, context, state)
+
+    async def _on_validation_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                   state: _PipelineState, ex: Exception):
+        state.parsed_message.errors.append(ex)
+        await handle_error(self.error_handlers, "on_validation_error", update, context, ex, self.help_message,
+                           parsed_message=state.parsed_message)
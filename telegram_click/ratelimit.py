@@ -0,0 +1,83 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import threading
+import time
+
+from telegram import Update
+
+from telegram_click.cache import LRUCache
+
+
+def _user_id(update: Update) -> int or None:
+    """
+    :param update: message update
+    :return: the id of the user that sent the message
+    """
+    user = update.effective_user
+    return user.id if user is not None else None
+
+
+class RateLimit:
+    """
+    Limits how often a command can be used, using a token bucket per user (or any other key).
+    Each bucket holds up to "rate" tokens and is refilled with "rate" tokens every "per" seconds.
+    """
+
+    def __init__(self, rate: int, per: float = 60, key: callable = None, maxsize: int = 10000,
+                 timer: callable = time.monotonic):
+        """
+        Creates a rate limit
+        :param rate: the number of times the command can be used within "per" seconds
+        :param per: the length of the time window in seconds
+        :param key: function that returns the key of the bucket to use for an update, the user id if None
+        :param maxsize: the maximum number of buckets kept in memory,
+                        the least recently used bucket is evicted (and thereby reset) if exceeded
+        :param timer: the clock used to refill buckets
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive: {}".format(rate))
+        if per <= 0:
+            raise ValueError("Time window must be positive: {}".format(per))
+        self.rate = rate
+        self.per = per
+        self._key = key if key is not None else _user_id
+        self._timer = timer
+        # map key -> (tokens, time of last update)
+        self._buckets = LRUCache(maxsize)
+        self._lock = threading.Lock()
+
+    def try_acquire(self, update: Update) -> bool:
+        """
+        Takes a token from the bucket of the given update
+        :param update: message update
+        :return: True if the update is within the rate limit, False otherwise
+        """
+        key = self._key(update)
+        now = self._timer()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.rate, now))
+            tokens = min(self.rate, tokens + (now - last) * self.rate / self.per)
+            if tokens < 1:
+                self._buckets.put(key, (tokens, now))
+                return False
+
+            self._buckets.put(key, (tokens - 1, now))
+            return True
@@ -0,0 +1,123 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+from typing import Iterator, List
+
+from telegram_click.const import KEY_NAMES
+from telegram_click.util import find_duplicates
+
+
+class CommandRegistry:
+    """
+    Collection of the commands of a bot, indexed by command name (and alias).
+    Like telegram itself, names are compared case-insensitively.
+    Entries are dictionaries using the KEY_* constants as keys.
+    Iterating a registry yields its entries in order of registration.
+    """
+
+    def __init__(self):
+        # entries in order of registration, keyed by identity (dicts are not hashable)
+        self._entries = {}
+        # map lowercase command name (and alias) -> entry
+        self._name_index = {}
+
+    def register(self, entry: dict) -> dict:
+        """
+        Adds a command
+        :param entry: the command entry
+        :return: the entry
+        """
+        self.check_name_clashes(entry[KEY_NAMES])
+        self._entries[id(entry)] = entry
+        for name in entry[KEY_NAMES]:
+            self._name_index[name.lower()] = entry
+        return entry
+
+    def append(self, entry: dict):
+        """
+        Adds a command, like register (for compatibility with the former list based COMMAND_LIST)
+        :param entry: the command entry
+        """
+        self.register(entry)
+
+    def unregister(self, name: str) -> dict or None:
+        """
+        Removes a command
+        :param name: any name (or alias) of the command
+        :return: the removed entry, or None if there is no command with the given name
+        """
+        entry = self._name_index.get(name.lower())
+        if entry is None:
+            return None
+
+        del self._entries[id(entry)]
+        for entry_name in entry[KEY_NAMES]:
+            del self._name_index[entry_name.lower()]
+        return entry
+
+    def replace(self, entry: dict) -> List[dict]:
+        """
+        Adds a command, removing all commands that use any of its names first
+        :param entry: the command entry
+        :return: the removed entries
+        """
+        removed = []
+        for name in entry[KEY_NAMES]:
+            existing = self.unregister(name)
+            if existing is not None:
+                removed.append(existing)
+        self.register(entry)
+        return removed
+
+    def get(self, name: str) -> dict or None:
+        """
+        :param name: any name (or alias) of a command
+        :return: the entry of the command, or None
+        """
+        return self._name_index.get(name.lower())
+
+    def check_name_clashes(self, names: List[str]):
+        """
+        Checks if any of the given names is already used (or used multiple times) and raises an exception if so
+        :param names: command names
+        """
+        clashing = list(filter(lambda x: x.lower() in self._name_index, names))
+        clashing.extend(find_duplicates(list(map(lambda x: x.lower(), names))))
+        if len(clashing) > 0:
+            raise ValueError("Command names must be unique! Clashing names: {}".format(", ".join(clashing)))
+
+    def clear(self):
+        """
+        Removes all commands
+        """
+        self._entries.clear()
+        self._name_index.clear()
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(list(self._entries.values()))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name: str):
+        return name.lower() in self._name_index
+
+    def __repr__(self):
+        return "<{} commands={}>".format(self.__class__.__name__, len(self))
@@ -0,0 +1,136 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import inspect
+import logging
+from typing import List
+
+from telegram import Update
+from telegram.ext import ContextTypes, MessageHandler, filters
+from telegram.ext.filters import BaseFilter
+
+from telegram_click.const import KEY_CALLBACK
+from telegram_click.message import get_parsed_message
+from telegram_click.registry import CommandRegistry
+from telegram_click.util import send_message, escape_for_markdown
+
+LOGGER = logging.getLogger(__name__)
+
+
+class CommandRouter:
+    """
+    Routes all commands of a bot through a single handler,
+    using a dictionary lookup of the command name instead of one CommandHandler per command
+    """
+
+    UNKNOWN_COMMAND_MESSAGE = ":exclamation: Unknown command `/{}`"
+
+    def __init__(self, callbacks: List[callable] = None, unknown_command_callback: callable = None,
+                 registry: CommandRegistry = None):
+        """
+        Creates a router
+        :param callbacks: functions decorated with @command (or @command_group), also bound methods,
+                          all callbacks in the registry are used if None, except for methods
+                          (decorated within a class body), which have to be passed as bound methods
+        :param unknown_command_callback: called for commands targeted at this bot that are not known,
+                                         an "Unknown command" message is sent if None
+        :param registry: the registry to take the callbacks from, COMMAND_LIST is used if None
+        """
+        # map lowercase command name (and alias) -> callback
+        self._routes = {}
+        self.unknown_command_callback = unknown_command_callback
+
+        if callbacks is None:
+            if registry is None:
+                from telegram_click import COMMAND_LIST
+                registry = COMMAND_LIST
+            callbacks = list(filter(lambda x: x is not None and not getattr(x, "is_method", False),
+                                    map(lambda x: x.get(KEY_CALLBACK), registry)))
+
+        for callback in callbacks:
+            self.add(callback)
+
+    def add(self, callback: callable, names: [str] = None):
+        """
+        Adds a command
+        :param callback: the callback of the command
+        :param names: the names of the command, taken from the @command decorator if None
+        """
+        if names is None:
+            names = getattr(callback, "command_names", None)
+            if names is None:
+                raise ValueError("Callback is not decorated with @command, names have to be specified: {}".format(
+                    callback))
+        if getattr(callback, "is_method", False) and not inspect.ismethod(callback):
+            raise ValueError("Callback is a method, it has to be passed as bound method: {}".format(callback))
+
+        for name in names:
+            key = name.lower()
+            if key in self._routes:
+                raise ValueError("Command names must be unique! Clashing names: {}".format(name))
+            self._routes[key] = callback
+
+    def create_handler(self, handler_filters: BaseFilter = None) -> MessageHandler:
+        """
+        Creates the single handler for all commands of this router
+        :param handler_filters: additional filters for the handler (f.ex. ~filters.FORWARDED)
+        :return: the handler to add to the application
+        """
+        command_filter = filters.COMMAND
+        if handler_filters is not None:
+            command_filter = command_filter & handler_filters
+        return MessageHandler(command_filter, self.route)
+
+    async def route(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Calls the callback of the command in the given update
+        :param update: message update
+        :param context: message context
+        """
+        message = update.effective_message
+        if message is None or message.text is None:
+            return
+
+        # shared with the callback wrapper, so the message is only split up once
+        parsed_message = get_parsed_message(update, context)
+        if parsed_message.command is None or not parsed_message.text.startswith("/"):
+            return
+
+        bot_username = context.bot.username
+        name = parsed_message.command
+        target = parsed_message.target
+
+        callback = self._routes.get(name.lower())
+        if callback is not None:
+            # the command target is checked by the callback wrapper
+            return await callback(update, context)
+
+        if target != bot_username:
+            # unknown commands of other bots are none of our business
+            return
+
+        LOGGER.debug("Unknown command in chat {}: {}".format(message.chat_id, message.text))
+        if self.unknown_command_callback is not None:
+            return await self.unknown_command_callback(update, context)
+
+        await send_message(context.bot, chat_id=message.chat_id,
+                           message=self.UNKNOWN_COMMAND_MESSAGE.format(escape_for_markdown(name)),
+                           parse_mode="MARKDOWN",
+                           reply_to=message.message_id)
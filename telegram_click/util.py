@@ -18,6 +18,7 @@
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
 
+import inspect
 import logging
 
 from telegram import Bot
@@ -50,6 +51,107 @@ def find_duplicates(l: list) -> []:
     return result
 
 
+class _TrieNode:
+    __slots__ = ("children", "key", "value", "unique")
+
+    def __init__(self):
+        self.children = {}
+        # the key ending at this node and its value, if any
+        self.key = None
+        self.value = None
+        # the value shared by all keys below this node, or _AMBIGUOUS if they differ
+        self.unique = _EMPTY
+
+
+# markers for trie nodes without a unique value
+_EMPTY = object()
+_AMBIGUOUS = object()
+
+
+class PrefixTrie:
+    """
+    Character trie that resolves unique key prefixes in O(len(prefix)), independent of the number of keys
+    """
+
+    def __init__(self, items: [(str, any)] = None):
+        """
+        Creates a trie
+        :param items: optional (key, value) pairs to insert
+        """
+        self._root = _TrieNode()
+        if items is not None:
+            for key, value in items:
+                self.insert(key, value)
+
+    def insert(self, key: str, value: any):
+        """
+        Inserts a key
+        :param key: the key
+        :param value: the value of the key (different keys may share the same value, f.ex. aliases)
+        """
+        node = self._root
+        self._add_unique(node, value)
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                child = _TrieNode()
+                node.children[char] = child
+            node = child
+            self._add_unique(node, value)
+        node.key = key
+        node.value = value
+
+    @staticmethod
+    def _add_unique(node: _TrieNode, value: any):
+        if node.unique is _EMPTY:
+            node.unique = value
+        elif node.unique is not _AMBIGUOUS and node.unique != value:
+            node.unique = _AMBIGUOUS
+
+    def _find(self, prefix: str) -> _TrieNode or None:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def get_unique(self, prefix: str, default: any = None) -> any:
+        """
+        Resolves a prefix to the value of the keys starting with it
+        :param prefix: the prefix
+        :param default: the value to return if no key, or keys with different values start with the given prefix
+        :return: the value of the key matching the prefix exactly, the shared value of all keys starting with the prefix,
+                 or the default
+        """
+        node = self._find(prefix)
+        if node is None:
+            return default
+        if node.key is not None:
+            return node.value
+        if node.unique is _EMPTY or node.unique is _AMBIGUOUS:
+            return default
+        return node.unique
+
+    def keys_with_prefix(self, prefix: str) -> [str]:
+        """
+        :param prefix: the prefix
+        :return: all keys starting with the given prefix, in alphabetical order
+        """
+        node = self._find(prefix)
+        if node is None:
+            return []
+
+        keys = []
+        pending = [node]
+        while len(pending) > 0:
+            node = pending.pop()
+            if node.key is not None:
+                keys.append(node.key)
+            pending.extend(node.children.values())
+        return sorted(keys)
+
+
 def find_first(args: [], type: type):
     """
     Finds the first element in the list of the given type
@@ -62,6 +164,41 @@ def find_first(args: [], type: type):
             return arg
 
 
+def is_async_callable(func: callable) -> bool:
+    """
+    Checks if calling the given function returns an awaitable
+    :param func: the function (or callable object) to check
+    :return: True if the function is a coroutine function, false otherwise
+    """
+    if func is None:
+        return False
+    if inspect.iscoroutinefunction(func):
+        return True
+    return inspect.iscoroutinefunction(getattr(func, "__call__", None))
+
+
+def accepts_keyword(func: callable, name: str, var_keyword: bool = True) -> bool:
+    """
+    Checks if the given function can be called with a keyword argument of the given name
+    :param func: the function to check
+    :param name: the name of the keyword argument
+    :param var_keyword: whether a function accepting arbitrary keyword arguments (**kwargs) counts
+    :return: True if the function accepts the keyword argument, false otherwise
+    """
+    try:
+        parameters = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return False
+
+    for parameter in parameters:
+        if parameter.kind == inspect.Parameter.VAR_KEYWORD and var_keyword:
+            return True
+        if parameter.name == name and parameter.kind in [inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                                                         inspect.Parameter.KEYWORD_ONLY]:
+            return True
+    return False
+
+
 def escape_for_markdown(text: str or None) -> str:
     """
     Escapes text to use as plain text in a markdown document
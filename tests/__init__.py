@@ -18,8 +18,70 @@
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
 
+import datetime
 import unittest
 
+import telegram
+from telegram import Update
+from telegram.ext import CallbackContext, ContextTypes
+
+from telegram_click.error_handler import ErrorHandler
+from telegram_click.permission.base import Permission
+from telegram_click.ratelimit import RateLimit
+
 
 class TestBase(unittest.TestCase):
     pass
+
+
+class _MockBot:
+    username = "mybot"
+
+
+class MockContext(CallbackContext):
+    """
+    Callback context of a bot that does not need to be initialized
+    """
+
+    @property
+    def bot(self):
+        return _MockBot()
+
+
+class RecordingErrorHandler(ErrorHandler):
+    """
+    Error handler that records errors instead of sending messages
+    """
+
+    def __init__(self):
+        self.errors = []
+
+    async def on_permission_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                  permissions: Permission) -> bool:
+        self.errors.append(("permission", permissions))
+        return True
+
+    async def on_rate_limit_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                  rate_limit: RateLimit) -> bool:
+        self.errors.append(("rate_limit", rate_limit))
+        return True
+
+    async def on_validation_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE, exception: Exception,
+                                  help_message: str) -> bool:
+        self.errors.append(("validation", str(exception), help_message))
+        return True
+
+    async def on_execution_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                 exception: Exception) -> bool:
+        self.errors.append(("execution", exception))
+        return True
+
+
+def create_update(text: str) -> Update:
+    """
+    Helper method to create an "Update" object for a text message
+    """
+    user = telegram.User(id=12345678, first_name="Max", is_bot=False)
+    chat = telegram.Chat(id=-12345678, type="private")
+    message = telegram.Message(message_id=1, date=datetime.datetime.now(), chat=chat, from_user=user, text=text)
+    return Update(update_id=1, message=message)
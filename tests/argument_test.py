@@ -18,10 +18,20 @@
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
 
-from telegram_click.argument import Argument
+import asyncio
+from enum import Enum
+
+from telegram_click.argument import Argument, Selection
+from telegram_click.help import generate_argument_description, generate_constraints_description
 from tests import TestBase
 
 
+class Color(Enum):
+    RED = "r"
+    GREEN = "g"
+    DARK_BLUE = 3
+
+
 class ArgumentTest(TestBase):
 
     def test_str_argument(self):
@@ -68,3 +78,216 @@ class ArgumentTest(TestBase):
         self.assertEqual(arg.parse_arg_value("10"), 10.0)
         self.assertEqual(arg.parse_arg_value("10.2"), 10.2)
         self.assertEqual(arg.parse_arg_value("3%"), 0.03)
+
+    def test_converter_cache(self):
+        calls = []
+
+        def converter(value: str) -> int:
+            calls.append(value)
+            return int(value)
+
+        arg = Argument(
+            name="cached_arg",
+            description="cached description",
+            type=int,
+            converter=converter,
+            validator=lambda x: x > 0,
+            example="1",
+            cache_size=2
+        )
+
+        self.assertEqual(arg.parse_arg_value("1"), 1)
+        self.assertEqual(arg.parse_arg_value("1"), 1)
+        self.assertEqual(arg.parse_arg_value("2"), 2)
+        self.assertEqual(arg.parse_arg_value("3"), 3)
+        # "1" has been evicted
+        self.assertEqual(arg.parse_arg_value("1"), 1)
+        self.assertEqual(calls, ["1", "2", "3", "1"])
+        self.assertEqual(arg.converter_cache.hits, 1)
+        self.assertAlmostEqual(arg.converter_cache.hit_rate, 1 / 5)
+
+        # validation is still applied to cached values
+        self.assertRaises(ValueError, arg.parse_arg_value, "-1")
+        self.assertRaises(ValueError, arg.parse_arg_value, "-1")
+        self.assertEqual(calls[-1], "-1")
+        self.assertEqual(len(calls), 5)
+
+    def test_async_converter_cache(self):
+        calls = []
+
+        async def converter(value: str) -> str:
+            calls.append(value)
+            return value.upper()
+
+        arg = Argument(
+            name="cached_arg",
+            description="cached description",
+            converter=converter,
+            example="a",
+            cache_size=10
+        )
+
+        self.assertEqual(asyncio.run(arg.parse_arg_value_async("a")), "A")
+        self.assertEqual(asyncio.run(arg.parse_arg_value_async("a")), "A")
+        self.assertEqual(calls, ["a"])
+
+    def test_selection(self):
+        arg = Selection(
+            name="currency",
+            description="currency description",
+            allowed_values=["BTC", "ETH", "EUR", "USD"],
+        )
+
+        self.assertEqual(arg.parse_arg_value("ETH"), "ETH")
+        self.assertRaises(ValueError, arg.parse_arg_value, "eth")
+        self.assertRaises(ValueError, arg.parse_arg_value, "E")
+
+        arg = Selection(
+            name="currency",
+            description="currency description",
+            allowed_values=["BTC", "ETH", "EUR", "USD"],
+            ignore_case=True,
+            allow_prefix=True
+        )
+
+        self.assertEqual(arg.parse_arg_value("eth"), "ETH")
+        self.assertEqual(arg.parse_arg_value("b"), "BTC")
+        self.assertEqual(arg.parse_arg_value("et"), "ETH")
+        with self.assertRaises(ValueError) as context:
+            arg.parse_arg_value("e")
+        self.assertIn("eth, eur", str(context.exception))
+        self.assertRaises(ValueError, arg.parse_arg_value, "x")
+
+    def test_selection_converter_fallback(self):
+        calls = []
+
+        def converter(value: str) -> int:
+            calls.append(value)
+            return int(value)
+
+        arg = Selection(
+            name="count",
+            description="count description",
+            allowed_values=list(range(1000)),
+            type=int,
+            converter=converter
+        )
+
+        # string forms of allowed values are found without calling the converter
+        self.assertEqual(arg.parse_arg_value("999"), 999)
+        self.assertEqual(calls, [])
+        self.assertEqual(arg.parse_arg_value("007"), 7)
+        self.assertEqual(calls, ["007"])
+        self.assertRaises(ValueError, arg.parse_arg_value, "1000")
+
+        # built-in converters are used as fallback too
+        arg = Selection(
+            name="count",
+            description="count description",
+            allowed_values=[1, 2, 3],
+            type=int
+        )
+        self.assertEqual(arg.parse_arg_value("02"), 2)
+        self.assertRaises(ValueError, arg.parse_arg_value, "4")
+
+        self.assertRaises(ValueError, Selection, "case", "clashing values", ["a", "A"], ignore_case=True)
+
+    def test_enum_argument(self):
+        arg = Argument(
+            name="color",
+            description="enum description",
+            type=Color,
+            example="red",
+            optional=True,
+            default=Color.GREEN
+        )
+
+        self.assertEqual(arg.parse_arg_value("RED"), Color.RED)
+        self.assertEqual(arg.parse_arg_value("dark_blue"), Color.DARK_BLUE)
+        self.assertEqual(arg.parse_arg_value("G"), Color.GREEN)
+        self.assertEqual(arg.parse_arg_value("3"), Color.DARK_BLUE)
+        self.assertRaises(ValueError, arg.parse_arg_value, "blue")
+
+        description = generate_argument_description(arg)
+        self.assertIn("red, green, dark\\_blue", description)
+        self.assertIn("(`green`)", description)
+
+    def test_constraints(self):
+        arg = Argument(
+            name="age",
+            description="int description",
+            type=int,
+            example="25",
+            min=0,
+            max=150
+        )
+
+        self.assertEqual(arg.parse_arg_value("0"), 0)
+        self.assertEqual(arg.parse_arg_value("150"), 150)
+        self.assertRaises(ValueError, arg.parse_arg_value, "-1")
+        self.assertRaises(ValueError, arg.parse_arg_value, "151")
+        self.assertEqual(generate_constraints_description(arg), "min: 0, max: 150")
+
+        arg = Argument(
+            name="username",
+            description="str description",
+            example="markus",
+            min_len=3,
+            max_len=8,
+            pattern="[a-z_]+",
+            validator=lambda x: x != "admin"
+        )
+
+        self.assertEqual(arg.parse_arg_value("markus"), "markus")
+        self.assertRaises(ValueError, arg.parse_arg_value, "ab")
+        self.assertRaises(ValueError, arg.parse_arg_value, "abcdefghi")
+        self.assertRaises(ValueError, arg.parse_arg_value, "Markus")
+        self.assertRaises(ValueError, arg.parse_arg_value, "admin")
+        self.assertIn("[min length: 3, max length: 8, pattern: `[a-z_]+`]", generate_argument_description(arg))
+
+        arg = Argument(
+            name="values",
+            description="int description",
+            type=int,
+            example="1 2",
+            nargs="*",
+            min=1,
+            max_len=3
+        )
+
+        self.assertEqual(arg.parse_arg_value(["1", "2", "3"]).tolist(), [1, 2, 3])
+        self.assertEqual(arg.parse_arg_value([]).tolist(), [])
+        self.assertRaises(ValueError, arg.parse_arg_value, ["1", "0"])
+        self.assertRaises(ValueError, arg.parse_arg_value, ["1", "2", "3", "4"])
+
+        arg = Argument(name="plain", description="str description", example="x")
+        self.assertIsNone(generate_constraints_description(arg))
+        self.assertIsNone(arg.constraints)
+        self.assertIsNone(arg.min)
+
+    def test_constraint_types(self):
+        # constraints that don't fit the type of the argument are rejected upfront
+        self.assertRaises(ValueError, lambda: Argument(name="a", description="a", type=int, example="1", min_len=1))
+        self.assertRaises(ValueError, lambda: Argument(name="a", description="a", example="x", min=3))
+        self.assertRaises(ValueError, lambda: Argument(name="a", description="a", type=Color, example="red", max=1))
+        Argument(name="a", description="a", type=float, example="1", min=0)
+        Argument(name="a", description="a", type=int, example="1", nargs="*", min_len=1)
+
+        # values of custom converters are checked when parsing, and reported as validation errors
+        arg = Argument(name="a", description="a", type=object, converter=lambda x: x, example="x", min=3)
+        self.assertRaises(ValueError, arg.parse_arg_value, "5")
+        arg = Argument(name="a", description="a", type=object, converter=int, example="1", max_len=3)
+        self.assertRaises(ValueError, arg.parse_arg_value, "5")
+
+    def test_immutable(self):
+        arg1 = Argument(name="a", description="a", type=int, example="1")
+        arg2 = Argument(name="b", description="b", type=int, example="1")
+        arg3 = Argument(name="c", description="c", type=Color, example="red")
+        arg4 = Argument(name="d", description="d", type=Color, example="red")
+
+        self.assertRaises(AttributeError, setattr, arg1, "optional", True)
+        self.assertRaises(AttributeError, delattr, arg1, "optional")
+        self.assertFalse(hasattr(arg1, "__dict__"))
+        # built-in converters are shared
+        self.assertIs(arg1.converter, arg2.converter)
+        self.assertIs(arg3.converter, arg4.converter)
@@ -0,0 +1,109 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import asyncio
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes
+
+from telegram_click.argument import Argument
+from telegram_click.decorator import command_group
+from telegram_click.permission.base import Permission
+from tests import TestBase, MockContext, RecordingErrorHandler, create_update
+
+
+class _FalsePermission(Permission):
+    async def evaluate(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        return False
+
+
+class CommandGroupTest(TestBase):
+
+    def setUp(self):
+        self.context = MockContext(Application.builder().token("123:abc").build())
+        self.error_handler = RecordingErrorHandler()
+        self.calls = []
+
+        @command_group(name=["repo_test", "r_test"], description="Manage repositories",
+                       error_handler=self.error_handler)
+        async def repo(update, context):
+            self.calls.append(("repo",))
+
+        @repo.command(name=["list", "ls"], description="List repositories")
+        async def repo_list(update, context):
+            self.calls.append(("list",))
+
+        @repo.command(name="add", description="Add a repository",
+                      arguments=[Argument(name="url", description="url", example="x")])
+        async def repo_add(update, context, url: str):
+            self.calls.append(("add", url))
+
+        @repo.group(name="remote", description="Manage remotes")
+        async def repo_remote(update, context):
+            self.calls.append(("remote",))
+
+        @repo_remote.command(name="remove", description="Remove a remote", permissions=_FalsePermission(),
+                             arguments=[Argument(name="id", description="id", type=int, example="1")])
+        async def repo_remote_remove(update, context, id: int):
+            self.calls.append(("remove", id))
+
+        @repo_remote.command(name="rename", description="Rename a remote",
+                             arguments=[Argument(name="id", description="id", type=int, example="1")])
+        async def repo_remote_rename(update, context, id: int):
+            self.calls.append(("rename", id))
+
+        self.repo = repo
+
+    def tearDown(self):
+        from telegram_click import COMMAND_LIST
+        COMMAND_LIST.unregister("repo_test")
+
+    def _dispatch(self, text: str):
+        asyncio.run(self.repo(create_update(text), self.context))
+
+    def test_dispatch(self):
+        self._dispatch("/repo_test")
+        self._dispatch("/r_test ls")
+        self._dispatch("/repo_test  add  --url x")
+        self._dispatch("/repo_test remote")
+        self._dispatch("/repo_test remote rename 3")
+        self.assertEqual(self.calls, [("repo",), ("list",), ("add", "x"), ("remote",), ("rename", 3)])
+        self.assertEqual(self.error_handler.errors, [])
+
+    def test_errors(self):
+        self._dispatch("/repo_test delete")
+        self._dispatch("/repo_test remote remove 1")
+        self._dispatch("/repo_test remote rename x")
+        self.assertEqual(self.calls, [])
+
+        kinds = list(map(lambda x: x[0], self.error_handler.errors))
+        self.assertEqual(kinds, ["validation", "permission", "validation"])
+        # unknown subcommands show the help of the group
+        self.assertIn("`remote`", self.error_handler.errors[0][2])
+        # invalid arguments show the help of the subcommand
+        self.assertIn("/repo\\_test remote rename", self.error_handler.errors[2][2])
+
+    def test_name_clashes(self):
+        def register():
+            @self.repo.command(name="ls", description="List")
+            async def clashing(update, context):
+                pass
+
+        self.assertRaises(ValueError, register)
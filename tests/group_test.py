@@ -0,0 +1,89 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+from telegram_click.argument import Argument, Flag
+from telegram_click.group import ArgumentGroup, ExactlyOneOf, AtMostOneOf, Requires
+from telegram_click.parser import ParsePlan, parse_telegram_command
+from tests import TestBase
+
+
+class ArgumentGroupTest(TestBase):
+
+    def test_exactly_one_of(self):
+        plan = ParsePlan([
+            Argument(name=["id", "i"], description="id", type=int, example="1", optional=True),
+            Argument(name="name", description="name", example="a", optional=True),
+        ], groups=[ExactlyOneOf("i", "name")])
+
+        command, parsed_args = parse_telegram_command("mybot", "/command --id 1", plan)
+        self.assertEqual(parsed_args, {"id": 1, "name": None})
+        command, parsed_args = parse_telegram_command("mybot", "/command --name a", plan)
+        self.assertEqual(parsed_args, {"id": None, "name": "a"})
+        # positional arguments count as specified too
+        command, parsed_args = parse_telegram_command("mybot", "/command 1", plan)
+        self.assertEqual(parsed_args, {"id": 1, "name": None})
+
+        with self.assertRaises(ValueError) as context:
+            parse_telegram_command("mybot", "/command", plan)
+        self.assertIn("Exactly one of", str(context.exception))
+        self.assertRaises(ValueError, parse_telegram_command, "mybot", "/command --id 1 --name a", plan)
+
+    def test_at_most_one_of(self):
+        plan = ParsePlan([
+            Flag(name="json", description="json"),
+            Flag(name="csv", description="csv"),
+        ], groups=[AtMostOneOf("json", "csv")])
+
+        command, parsed_args = parse_telegram_command("mybot", "/command", plan)
+        self.assertEqual(parsed_args, {"json": False, "csv": False})
+        command, parsed_args = parse_telegram_command("mybot", "/command --csv", plan)
+        self.assertEqual(parsed_args, {"json": False, "csv": True})
+        self.assertRaises(ValueError, parse_telegram_command, "mybot", "/command --csv --json", plan)
+
+    def test_requires(self):
+        converted = []
+
+        def converter(value: str) -> int:
+            converted.append(value)
+            return int(value)
+
+        plan = ParsePlan([
+            Argument(name="start", description="start", type=int, converter=converter, example="1", optional=True),
+            Argument(name="end", description="end", type=int, converter=converter, example="2", optional=True),
+        ], groups=[Requires("end", "start")])
+
+        command, parsed_args = parse_telegram_command("mybot", "/command --start 1", plan)
+        self.assertEqual(parsed_args, {"start": 1, "end": None})
+        command, parsed_args = parse_telegram_command("mybot", "/command --end 2 --start 1", plan)
+        self.assertEqual(parsed_args, {"start": 1, "end": 2})
+
+        converted.clear()
+        with self.assertRaises(ValueError) as context:
+            parse_telegram_command("mybot", "/command --end 2", plan)
+        self.assertIn("requires", str(context.exception))
+        # groups are checked before any value is converted
+        self.assertEqual(converted, [])
+
+    def test_invalid_group(self):
+        arguments = [Argument(name="a", description="a", example="1")]
+        self.assertRaises(ValueError, ParsePlan, arguments, groups=[ExactlyOneOf("a", "b")])
+        self.assertRaises(ValueError, Requires, "a")
+        # the base class can not be used on its own
+        self.assertRaises(TypeError, ArgumentGroup, "a", "b")
@@ -0,0 +1,119 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import asyncio
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes
+
+from telegram_click.argument import Argument
+from telegram_click.decorator import command
+from telegram_click.error_handler import ErrorHandler
+from telegram_click.message import ParsedMessage, get_parsed_message
+from telegram_click.parser import ParseLimits
+from telegram_click.registry import CommandRegistry
+from tests import TestBase, MockContext, create_update
+
+
+class _ParsedMessageErrorHandler(ErrorHandler):
+    """
+    Error handler that records the parsed message passed to it
+    """
+
+    def __init__(self):
+        self.parsed_messages = []
+
+    async def on_validation_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE, exception: Exception,
+                                  help_message: str, parsed_message: ParsedMessage = None) -> bool:
+        self.parsed_messages.append(parsed_message)
+        return True
+
+
+class ParsedMessageTest(TestBase):
+
+    def setUp(self):
+        self.context = MockContext(Application.builder().token("123:abc").build())
+
+    def test_split(self):
+        parsed_message = ParsedMessage(create_update("/repo@otherbot add 'a b' -f").effective_message, "mybot")
+        self.assertEqual(parsed_message.command, "repo")
+        self.assertEqual(parsed_message.target, "otherbot")
+        self.assertEqual(parsed_message.args_text, "add 'a b' -f")
+        self.assertEqual(parsed_message.subcommand_args(1), (["add"], "'a b' -f"))
+
+        spans = list(map(lambda x: (x.start, x.end), parsed_message.tokens))
+        self.assertEqual(spans, [(0, 3), (4, 9), (10, 12)])
+        self.assertEqual(parsed_message.tokens[1].value, "a b")
+
+    def test_tokens(self):
+        parsed_message = ParsedMessage(create_update("/note don't forget").effective_message, "mybot")
+        # free text with an unbalanced quote
+        self.assertEqual(parsed_message.tokens, [])
+
+        parsed_message = ParsedMessage(create_update("/test a b c").effective_message, "mybot")
+        parsed_message.limits = ParseLimits(max_tokens=2)
+        self.assertEqual(parsed_message.tokens, [])
+
+        parsed_message = ParsedMessage(create_update("/test a b c").effective_message, "mybot")
+        parsed_message.limits = ParseLimits(max_length=3)
+        self.assertEqual(parsed_message.tokens, [])
+
+        parsed_message = ParsedMessage(create_update("/test").effective_message, "mybot")
+        self.assertEqual(parsed_message.tokens, [])
+
+    def test_cached_on_context(self):
+        update = create_update("/test 1")
+        parsed_message = get_parsed_message(update, self.context)
+        self.assertIs(get_parsed_message(update, self.context), parsed_message)
+        self.assertEqual(parsed_message.target, "mybot")
+
+        other = get_parsed_message(create_update("/test 2"), self.context)
+        self.assertIsNot(other, parsed_message)
+        self.assertEqual(other.args_text, "2")
+
+    def test_passed_to_callback(self):
+        received = []
+
+        @command(name="message_test", description="Test", registry=CommandRegistry(),
+                 arguments=[Argument(name="value", description="value", type=int, example="1")])
+        async def callback(update, context, value: int, parsed_message: ParsedMessage):
+            received.append(parsed_message)
+
+        update = create_update("/message_test 5")
+        asyncio.run(callback(update, self.context))
+        self.assertEqual(len(received), 1)
+        self.assertIs(received[0], get_parsed_message(update, self.context))
+        self.assertEqual(received[0].arguments, {"value": 5})
+
+    def test_passed_to_error_handler(self):
+        error_handler = _ParsedMessageErrorHandler()
+
+        @command(name="message_test", description="Test", registry=CommandRegistry(), error_handler=error_handler,
+                 arguments=[Argument(name="value", description="value", type=int, example="1")])
+        async def callback(update, context, value: int):
+            pass
+
+        asyncio.run(callback(create_update("/message_test abc"), self.context))
+        self.assertEqual(len(error_handler.parsed_messages), 1)
+        parsed_message = error_handler.parsed_messages[0]
+        self.assertEqual(parsed_message.command, "message_test")
+        self.assertIsNone(parsed_message.arguments)
+        self.assertEqual(len(parsed_message.errors), 1)
+        self.assertIsInstance(parsed_message.errors[0], ValueError)
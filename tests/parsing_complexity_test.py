@@ -0,0 +1,90 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import time
+
+from telegram_click.argument import Argument, Flag
+from telegram_click.parser import ParsePlan, parse_command_args
+from tests import TestBase
+
+
+def _create_arguments(count: int) -> [Argument]:
+    arguments = []
+    for idx in range(count):
+        if idx % 10 == 0:
+            arguments.append(Flag(name="flag{}".format(idx), description="flag description"))
+        else:
+            arguments.append(Argument(name="arg{}".format(idx), description="int description", type=int,
+                                      example="1", optional=True, default=-1))
+    return arguments
+
+
+def _create_argument_text(arguments: [Argument], token_count: int) -> str:
+    # every fourth argument is specified by name, the rest is positional
+    named = []
+    for idx, argument in enumerate(arguments):
+        if argument.flag:
+            named.append("--{}".format(argument.name))
+        elif idx % 4 == 1:
+            named.append("--{} {}".format(argument.name, idx))
+    tokens = " ".join(named).split(" ")
+    positional = map(str, range(max(0, token_count - len(tokens))))
+    return " ".join(tokens + list(positional))
+
+
+def _measure(plan: ParsePlan, text: str) -> float:
+    """
+    :return: the best runtime of multiple parse runs in seconds
+    """
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        parse_command_args(text, plan)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+class ParsingComplexityTest(TestBase):
+    # generous upper bound for a single parse run, in seconds
+    TIME_BUDGET = 0.5
+
+    def test_many_arguments_and_tokens(self):
+        arguments = _create_arguments(200)
+        plan = ParsePlan(arguments)
+        text = _create_argument_text(arguments, 2000)
+
+        parsed_args = parse_command_args(text, plan)
+        self.assertEqual(len(parsed_args), len(arguments))
+        self.assertTrue(parsed_args["flag0"])
+        self.assertEqual(parsed_args["arg1"], 1)
+        self.assertEqual(parsed_args["arg2"], 0)
+
+        self.assertLess(_measure(plan, text), self.TIME_BUDGET)
+
+    def test_linear_scaling(self):
+        timings = []
+        for count in [500, 2000]:
+            arguments = _create_arguments(count)
+            plan = ParsePlan(arguments)
+            text = _create_argument_text(arguments, count * 2)
+            timings.append(_measure(plan, text))
+
+        # four times the input should take roughly four times as long, quadratic behaviour would be ~16 times
+        self.assertLess(timings[1] / timings[0], 8)
@@ -18,11 +18,24 @@
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
 
-from telegram_click.argument import Argument, Flag
-from telegram_click.parser import parse_telegram_command, split_into_tokens
+import asyncio
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from telegram_click.argument import Argument, Flag, Remainder, Selection
+from telegram_click.cache import LRUCache
+from telegram_click import parser
+from telegram_click.parser import (parse_telegram_command, ParseLimits, InputLimitExceeded, split_into_tokens, ParsePlan,
+                                   tokenize, iter_tokens, parse_many, parse_telegram_command_async)
 from tests import TestBase
 
 
+def _length(value: str) -> int:
+    return len(value)
+
+
 class ParserTest(TestBase):
 
     def test_flag(self):
@@ -68,6 +81,19 @@ class ParserTest(TestBase):
         self.assertTrue("flag" in parsed_args)
         self.assertTrue(parsed_args["flag"] is True)
 
+    def test_multi_flag_duplicate(self):
+        flag1 = Flag(name="f", description="some flag description")
+        flag2 = Flag(name="g", description="some flag description")
+        arg = Argument(name="value", description="some description", example="a")
+        expected_args = [arg, flag1, flag2]
+
+        bot_username = "mybot"
+        lazy_plan = ParsePlan(expected_args, lazy=True)
+        self.assertRaises(ValueError, parse_telegram_command, bot_username, "/command -ff a", expected_args)
+        self.assertRaises(ValueError, parse_telegram_command, bot_username, "/command -ff a -g", lazy_plan)
+        command, parsed_args = parse_telegram_command(bot_username, "/command -fg a", lazy_plan)
+        self.assertEqual(parsed_args, {"value": "a", "f": True, "g": True})
+
     def test_flag_missing(self):
         flag1 = Flag(
             name="flag",
@@ -245,3 +271,559 @@ class ParserTest(TestBase):
 
         single_test = "'\\'single quoted with \\'escaped single quote\\''"
         self.assertIn("''single quoted with 'escaped single quote''", split_into_tokens(single_test))
+
+    def test_token_splitting_quote_within_token(self):
+        self.assertEqual(['abc"d e"', 'f'], split_into_tokens('abc"d e"f'))
+        self.assertEqual(['a\\b', '"c"'], split_into_tokens("a\\b \t \"c\""))
+
+    def test_token_splitting_missing_closing_quote(self):
+        self.assertRaises(ValueError, split_into_tokens, '"abc')
+        self.assertRaises(ValueError, split_into_tokens, 'abc "d e')
+        self.assertRaises(ValueError, split_into_tokens, '"abc\\"')
+
+    def test_token_splitting_long_text(self):
+        words = ["word{}".format(i) for i in range(1000)]
+        self.assertEqual(words, split_into_tokens(" ".join(words)))
+
+        long_token = "x" * 4096
+        self.assertEqual([long_token], split_into_tokens(long_token))
+
+    def test_parse_plan(self):
+        flag1 = Flag(
+            name=["flag", "f"],
+            description="some flag description",
+        )
+        arg1 = Argument(
+            name=["first-arg", "a"],
+            description="str description",
+            example="v"
+        )
+        arg2 = Argument(
+            name="second",
+            description="int description",
+            type=int,
+            example="1",
+            optional=True,
+            default=5
+        )
+
+        plan = ParsePlan([flag1, arg1, arg2])
+
+        self.assertEqual(plan.flag_chars, frozenset(["f"]))
+        self.assertEqual(plan.positional, (1, 2))
+        self.assertEqual(plan.kwarg_names, ("flag", "first_arg", "second"))
+        self.assertEqual(plan.name_index["a"], 1)
+        self.assertRaises(AttributeError, setattr, plan, "positional", ())
+
+        bot_username = "mybot"
+        command, parsed_args = parse_telegram_command(bot_username, "/command -f value", plan)
+        self.assertEqual(parsed_args, {"flag": True, "first-arg": "value", "second": 5})
+
+        # the same plan can be reused for the next message
+        command, parsed_args = parse_telegram_command(bot_username, "/command value 7", plan)
+        self.assertEqual(parsed_args, {"flag": False, "first-arg": "value", "second": 7})
+
+    def test_tokenize(self):
+        text = ' --name "two \\"words\\"" -5 -f \'--quoted\' '
+        tokens = tokenize(text)
+
+        self.assertEqual(len(tokens), 5)
+        for token in tokens:
+            self.assertIs(token.source, text)
+
+        name_key, name_value, negative, flag, quoted_key = tokens
+        self.assertEqual((name_key.start, name_key.end), (1, 7))
+        self.assertTrue(name_key.is_key)
+        self.assertFalse(name_key.quoted)
+
+        self.assertTrue(name_value.quoted)
+        self.assertTrue(name_value.escaped)
+        self.assertFalse(name_value.is_key)
+        self.assertEqual(name_value.text, '"two "words""')
+        self.assertEqual(name_value.value, 'two "words"')
+
+        self.assertFalse(negative.is_key)
+        self.assertEqual(negative.value, "-5")
+        self.assertTrue(flag.is_key)
+
+        self.assertTrue(quoted_key.quoted)
+        self.assertFalse(quoted_key.is_key)
+        self.assertEqual(quoted_key.value, "--quoted")
+
+    def test_iter_tokens(self):
+        tokens = iter_tokens('first second "unbalanced')
+
+        self.assertEqual(next(tokens).value, "first")
+        self.assertEqual(next(tokens).value, "second")
+        self.assertRaises(ValueError, next, tokens)
+
+    def test_lazy_parsing(self):
+        arg1 = Argument(
+            name="first",
+            description="str description",
+            example="v"
+        )
+        arg2 = Argument(
+            name="second",
+            description="int description",
+            type=int,
+            example="1"
+        )
+
+        bot_username = "mybot"
+        command_line = '/command --second 2 one --unknown "unbalanced'
+
+        strict_plan = ParsePlan([arg1, arg2])
+        self.assertRaises(ValueError, parse_telegram_command, bot_username, command_line, strict_plan)
+
+        lazy_plan = ParsePlan([arg1, arg2], lazy=True)
+        command, parsed_args = parse_telegram_command(bot_username, command_line, lazy_plan)
+        self.assertEqual(parsed_args, {"first": "one", "second": 2})
+
+        # positional tokens are still bound after named arguments
+        command, parsed_args = parse_telegram_command(bot_username, "/command one --second 2 'unbalanced", lazy_plan)
+        self.assertEqual(parsed_args, {"first": "one", "second": 2})
+
+        # flags have to be bound as well before parsing can stop early
+        flag1 = Flag(
+            name="flag",
+            description="some flag description",
+        )
+        lazy_plan = ParsePlan([arg1, flag1], lazy=True)
+        command, parsed_args = parse_telegram_command(bot_username, "/command one --flag two", lazy_plan)
+        self.assertEqual(parsed_args, {"first": "one", "flag": True})
+
+    def test_remainder(self):
+        arg1 = Argument(
+            name="count",
+            description="int description",
+            type=int,
+            example="1"
+        )
+        flag1 = Flag(
+            name=["pin", "p"],
+            description="some flag description",
+        )
+        arg2 = Remainder(
+            name="text",
+            description="free text",
+            example="some text"
+        )
+
+        bot_username = "mybot"
+        expected_args = [arg1, flag1, arg2]
+
+        text = 'Buy "the good" milk,\tdon\'t  forget --pin '
+        command, parsed_args = parse_telegram_command(bot_username, "/command 3 {}".format(text), expected_args)
+        self.assertEqual(parsed_args, {"count": 3, "pin": False, "text": text.rstrip()})
+
+        # keys of unbound arguments are still processed in front of the remainder
+        command, parsed_args = parse_telegram_command(bot_username, "/command -p 3  -x \"y", expected_args)
+        self.assertEqual(parsed_args, {"count": 3, "pin": True, "text": '-x "y'})
+
+        # a remainder specified by name takes the rest of the text, too
+        command, parsed_args = parse_telegram_command(bot_username, "/command 2 --text hi  there ", expected_args)
+        self.assertEqual(parsed_args, {"count": 2, "pin": False, "text": "hi  there"})
+
+        command, parsed_args = parse_telegram_command(bot_username, "/command --count 2 --text=\"a b\" -p c",
+                                                      expected_args)
+        self.assertEqual(parsed_args, {"count": 2, "pin": False, "text": "\"a b\" -p c"})
+
+        self.assertRaises(ValueError, parse_telegram_command, bot_username, "/command 2 --text ", expected_args)
+
+        self.assertRaises(ValueError, parse_telegram_command, bot_username, "/command 3 -p ", expected_args)
+
+    def test_parse_cache(self):
+        arg1 = Argument(
+            name="currency",
+            description="str description",
+            example="btc"
+        )
+        arg2 = Argument(
+            name="amount",
+            description="float description",
+            type=float,
+            example="1.5",
+            optional=True,
+            default=1.0
+        )
+
+        cache = LRUCache(16)
+        plan = ParsePlan([arg1, arg2], cache=cache)
+
+        bot_username = "mybot"
+        for _ in range(3):
+            command, parsed_args = parse_telegram_command(bot_username, "/price btc", plan)
+            self.assertEqual(parsed_args, {"currency": "btc", "amount": 1.0})
+        command, parsed_args = parse_telegram_command(bot_username, "/price eth 2", plan)
+        self.assertEqual(parsed_args, {"currency": "eth", "amount": 2.0})
+
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(cache.hits, 2)
+
+        # invalid input is never cached
+        self.assertRaises(ValueError, parse_telegram_command, bot_username, "/price eth x", plan)
+        self.assertRaises(ValueError, parse_telegram_command, bot_username, "/price eth x", plan)
+        self.assertEqual(len(cache), 2)
+
+    def test_parse_cache_requires_pure_arguments(self):
+        arg1 = Argument(
+            name="age",
+            description="int description",
+            type=int,
+            validator=lambda x: x > 0,
+            example="1"
+        )
+        self.assertRaises(ValueError, ParsePlan, [arg1], cache=LRUCache(16))
+
+        arg2 = Argument(
+            name="age",
+            description="int description",
+            type=int,
+            validator=lambda x: x > 0,
+            example="1",
+            pure=True
+        )
+        ParsePlan([arg2], cache=LRUCache(16))
+
+    def test_parse_many(self):
+        arg1 = Argument(
+            name="city",
+            description="str description",
+            example="berlin"
+        )
+        flag1 = Flag(
+            name=["metric", "m"],
+            description="some flag description",
+        )
+
+        bot_username = "mybot"
+        texts = [
+            "/weather berlin",
+            "/weather@mybot -m 'new york'",
+            "/weather",
+            '/weather "unbalanced',
+            "/w paris",
+        ]
+
+        results = parse_many(bot_username, texts, [arg1, flag1])
+
+        self.assertEqual(len(results), len(texts))
+        self.assertEqual(results[0], ("weather", {"city": "berlin", "metric": False}, None))
+        self.assertEqual(results[1], ("weather", {"city": "new york", "metric": True}, None))
+        for command, parsed_args, error in results[2:4]:
+            self.assertEqual(command, "weather")
+            self.assertIsNone(parsed_args)
+            self.assertIsInstance(error, ValueError)
+        self.assertEqual(results[4], ("w", {"city": "paris", "metric": False}, None))
+
+    def test_parse_limits(self):
+        arg1 = Argument(
+            name="text",
+            description="str description",
+            example="v",
+            optional=True
+        )
+        flag1 = Flag(
+            name=["flag", "f"],
+            description="some flag description",
+        )
+
+        bot_username = "mybot"
+        plan = ParsePlan([arg1, flag1], limits=ParseLimits(max_length=20, max_tokens=3, max_keys=1))
+
+        command, parsed_args = parse_telegram_command(bot_username, "/command -f abc def", plan)
+        self.assertEqual(parsed_args, {"text": "abc", "flag": True})
+
+        self.assertRaises(InputLimitExceeded, parse_telegram_command, bot_username, "/command " + "x" * 21, plan)
+        self.assertRaises(InputLimitExceeded, parse_telegram_command, bot_username, "/command a b c d", plan)
+        self.assertRaises(InputLimitExceeded, parse_telegram_command, bot_username, "/command -f -f", plan)
+        # tokenization is aborted before reaching the unbalanced quote
+        self.assertRaises(InputLimitExceeded, parse_telegram_command, bot_username, '/command a b c d "e', plan)
+
+    def test_default_parse_limits(self):
+        arg1 = Argument(
+            name="text",
+            description="str description",
+            example="v"
+        )
+
+        bot_username = "mybot"
+        default_limits = parser.DEFAULT_PARSE_LIMITS
+        try:
+            parser.DEFAULT_PARSE_LIMITS = ParseLimits(max_tokens=2)
+            self.assertRaises(InputLimitExceeded, parse_telegram_command, bot_username, "/command a b c", [arg1])
+        finally:
+            parser.DEFAULT_PARSE_LIMITS = default_limits
+
+        command, parsed_args = parse_telegram_command(bot_username, "/command a b c", [arg1])
+        self.assertEqual(parsed_args, {"text": "a"})
+
+    def test_name_prefix(self):
+        flag1 = Flag(
+            name="verbose",
+            description="some flag description",
+        )
+        arg1 = Argument(
+            name=["description", "desc"],
+            description="str description",
+            example="v",
+            optional=True
+        )
+        arg2 = Argument(
+            name="version",
+            description="int description",
+            type=int,
+            example="1",
+            optional=True
+        )
+
+        bot_username = "mybot"
+        expected_args = [flag1, arg1, arg2]
+
+        command, parsed_args = parse_telegram_command(bot_username, "/command --verb --d=text —vers 2", expected_args)
+        self.assertEqual(parsed_args, {"verbose": True, "description": "text", "version": 2})
+
+        with self.assertRaises(ValueError) as context:
+            parse_telegram_command(bot_username, "/command --ver", expected_args)
+        self.assertIn("--verbose, --version", str(context.exception))
+
+        # abbreviated keys are never resolved as prefixes
+        self.assertRaises(ValueError, parse_telegram_command, bot_username, "/command -verb", expected_args)
+        self.assertRaises(ValueError, parse_telegram_command, bot_username, "/command --verb --verbose", expected_args)
+
+    def test_async_converters(self):
+        async def slow_upper(value: str) -> str:
+            await asyncio.sleep(0.2)
+            return value.upper()
+
+        async def slow_positive(value: int) -> bool:
+            await asyncio.sleep(0.2)
+            return value > 0
+
+        arg1 = Argument(name="a", description="a", example="x", converter=slow_upper)
+        arg2 = Argument(name="b", description="b", example="x", converter=slow_upper)
+        arg3 = Argument(name="c", description="c", example="1", type=int, validator=slow_positive)
+        arg4 = Argument(name="d", description="d", example="x", converter=slow_upper, optional=True, default="-")
+
+        bot_username = "mybot"
+        expected_args = [arg1, arg2, arg3, arg4]
+
+        start = time.perf_counter()
+        command, parsed_args = asyncio.run(
+            parse_telegram_command_async(bot_username, "/command x y 3", expected_args))
+        duration = time.perf_counter() - start
+        self.assertEqual(parsed_args, {"a": "X", "b": "Y", "c": 3, "d": "-"})
+        # converters and validators run concurrently
+        self.assertLess(duration, 0.5)
+
+        self.assertRaises(ValueError, asyncio.run,
+                          parse_telegram_command_async(bot_username, "/command x y 0", expected_args))
+        # async arguments can not be parsed synchronously
+        self.assertRaises(TypeError, parse_telegram_command, bot_username, "/command x y 3", expected_args)
+
+    def test_async_variadic_without_values(self):
+        async def upper(value: str) -> str:
+            return value.upper()
+
+        async def short(value: list) -> bool:
+            return len(value) < 3
+
+        arg1 = Argument(name="a", description="a", example="x", converter=upper, nargs="*")
+        arg2 = Argument(name="b", description="b", example="x", validator=short, nargs="*")
+
+        # a required variadic argument without any value is converted to an empty list
+        command, parsed_args = asyncio.run(parse_telegram_command_async("mybot", "/command", [arg1]))
+        self.assertEqual(parsed_args, {"a": []})
+        command, parsed_args = asyncio.run(parse_telegram_command_async("mybot", "/command", [arg2]))
+        self.assertEqual(parsed_args, {"b": []})
+
+        command, parsed_args = asyncio.run(parse_telegram_command_async("mybot", "/command x y", [arg1]))
+        self.assertEqual(parsed_args, {"a": ["X", "Y"]})
+        self.assertRaises(ValueError, asyncio.run,
+                          parse_telegram_command_async("mybot", "/command x y z", [arg2]))
+
+    def test_async_converter_failure_cancels_others(self):
+        cancelled = []
+
+        async def slow(value: str) -> str:
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(value)
+                raise
+            return value
+
+        async def failing(value: str) -> str:
+            raise ValueError("failed")
+
+        arg1 = Argument(name="a", description="a", example="x", converter=slow)
+        arg2 = Argument(name="b", description="b", example="x", converter=failing)
+
+        start = time.perf_counter()
+        self.assertRaises(ValueError, asyncio.run,
+                          parse_telegram_command_async("mybot", "/command x y", [arg1, arg2]))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(cancelled, ["x"])
+
+    def test_converter_executor(self):
+        threads = []
+
+        def heavy(value: str) -> int:
+            threads.append(threading.current_thread())
+            time.sleep(0.3)
+            return len(value)
+
+        async def parse_while_ticking(expected_args, executor=None) -> (dict, int):
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticker_task = asyncio.ensure_future(ticker())
+            plan = ParsePlan(expected_args, executor=executor)
+            _, parsed = await parse_telegram_command_async("mybot", "/command abc", plan)
+            ticker_task.cancel()
+            return parsed, ticks
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            arg1 = Argument(name="a", description="a", example="x", type=int, converter=heavy, executor=executor)
+            parsed_args, ticks = asyncio.run(parse_while_ticking([arg1]))
+            self.assertEqual(parsed_args, {"a": 3})
+            self.assertNotEqual(threads[-1], threading.current_thread())
+            # the event loop is not blocked by the conversion
+            self.assertGreater(ticks, 5)
+
+            # a command wide executor
+            arg2 = Argument(name="b", description="b", example="x", type=int, converter=heavy)
+            parsed_args, ticks = asyncio.run(parse_while_ticking([arg2], executor))
+            self.assertEqual(parsed_args, {"b": 3})
+            self.assertNotEqual(threads[-1], threading.current_thread())
+            self.assertGreater(ticks, 5)
+
+        # without an executor the converter runs inline
+        parsed_args, ticks = asyncio.run(parse_while_ticking([arg2]))
+        self.assertEqual(parsed_args, {"b": 3})
+        self.assertEqual(threads[-1], threading.current_thread())
+        self.assertEqual(ticks, 0)
+
+    def test_converter_process_executor(self):
+        arg1 = Argument(name="a", description="a", example="x", type=int, converter=_length, nargs="*",
+                        cache_size=10)
+        arg2 = Argument(name="b", description="b", example="x", type=int, converter=_length, optional=True)
+
+        # only the converter is sent to the executor, the argument itself doesn't need to be picklable
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            plan = ParsePlan([arg1, arg2], executor=executor)
+            _, parsed_args = asyncio.run(parse_telegram_command_async("mybot", "/command a bb ccc --b dddd", plan))
+            self.assertEqual(parsed_args, {"a": [1, 2, 3], "b": 4})
+
+            # cached values are not converted again
+            _, parsed_args = asyncio.run(parse_telegram_command_async("mybot", "/command bb eeeee", plan))
+            self.assertEqual(parsed_args, {"a": [2, 5], "b": None})
+
+    def test_selection_process_executor(self):
+        arg1 = Selection(name="a", description="a", allowed_values=[1, 2, 3], type=int, converter=_length)
+
+        # the lookup runs on the event loop, only the fallback converter is sent to the executor
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            plan = ParsePlan([arg1], executor=executor)
+            _, parsed_args = asyncio.run(parse_telegram_command_async("mybot", "/command 3", plan))
+            self.assertEqual(parsed_args, {"a": 3})
+            _, parsed_args = asyncio.run(parse_telegram_command_async("mybot", "/command bb", plan))
+            self.assertEqual(parsed_args, {"a": 2})
+            self.assertRaises(ValueError, asyncio.run,
+                              parse_telegram_command_async("mybot", "/command eeeee", plan))
+
+    def test_variadic_argument(self):
+        flag1 = Flag(
+            name=["flag", "f"],
+            description="some flag description",
+        )
+        arg1 = Argument(
+            name="name",
+            description="str description",
+            example="v"
+        )
+        arg2 = Argument(
+            name="values",
+            description="int description",
+            type=int,
+            example="1 2 3",
+            nargs="+"
+        )
+
+        bot_username = "mybot"
+        expected_args = [flag1, arg1, arg2]
+
+        command, parsed_args = parse_telegram_command(bot_username, "/stats a 1 -f 2 3", expected_args)
+        self.assertEqual(parsed_args["values"], array("q", [1, 2, 3]))
+        self.assertIsInstance(parsed_args["values"], array)
+        self.assertTrue(parsed_args["flag"])
+
+        command, parsed_args = parse_telegram_command(bot_username, "/stats --values 1 2 -f 3 --name a", expected_args)
+        self.assertEqual(parsed_args, {"flag": True, "name": "a", "values": array("q", [1, 2])})
+
+        numbers = list(range(-250, 250))
+        command, parsed_args = parse_telegram_command(
+            bot_username, "/stats a {}".format(" ".join(map(str, numbers))), expected_args)
+        self.assertEqual(parsed_args["values"].tolist(), numbers)
+
+        self.assertRaises(ValueError, parse_telegram_command, bot_username, "/stats a", expected_args)
+        self.assertRaises(ValueError, parse_telegram_command, bot_username, "/stats a 1 x", expected_args)
+        self.assertRaises(ValueError, parse_telegram_command, bot_username, "/stats a {}".format(2 ** 63),
+                          expected_args)
+
+    def test_variadic_argument_count(self):
+        validated = []
+
+        def validator(values) -> bool:
+            validated.append(values)
+            return sum(values) <= 1.0
+
+        arg1 = Argument(
+            name="point",
+            description="float description",
+            type=float,
+            example="0.5 0.5",
+            nargs=2,
+            validator=validator
+        )
+        arg2 = Argument(
+            name="label",
+            description="str description",
+            example="a"
+        )
+
+        bot_username = "mybot"
+        expected_args = [arg2, arg1]
+
+        command, parsed_args = parse_telegram_command(bot_username, "/command a 0.5 10% b", expected_args)
+        self.assertEqual(parsed_args, {"label": "a", "point": array("d", [0.5, 0.1])})
+        # the validator is called once with all values
+        self.assertEqual(len(validated), 1)
+
+        command, parsed_args = parse_telegram_command(bot_username, "/command --point 0.5 0.1 a", expected_args)
+        self.assertEqual(parsed_args, {"label": "a", "point": array("d", [0.5, 0.1])})
+
+        command, parsed_args = parse_telegram_command(bot_username, "/command --point=0.5 0.1 a", expected_args)
+        self.assertEqual(parsed_args, {"label": "a", "point": array("d", [0.5, 0.1])})
+
+        self.assertRaises(ValueError, parse_telegram_command, bot_username, "/command a 0.5", expected_args)
+        self.assertRaises(ValueError, parse_telegram_command, bot_username, "/command a 0.5 0.6", expected_args)
+
+        arg3 = Argument(
+            name="tags",
+            description="str description",
+            example="a b",
+            nargs="*"
+        )
+        command, parsed_args = parse_telegram_command(bot_username, "/command", [arg3])
+        self.assertEqual(parsed_args, {"tags": []})
+        command, parsed_args = parse_telegram_command(bot_username, "/command a 'b c'", [arg3])
+        self.assertEqual(parsed_args, {"tags": ["a", "b c"]})
+
+        self.assertRaises(ValueError, Argument, name="x", description="x", example="x", nargs=0)
@@ -0,0 +1,224 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import asyncio
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes
+
+from telegram_click import CommandTarget, parser
+from telegram_click.argument import Argument
+from telegram_click.decorator import command
+from telegram_click.parser import ParseLimits
+from telegram_click.permission.base import Permission
+from telegram_click.pipeline import Stage, DEFAULT_STAGES
+from telegram_click.ratelimit import RateLimit
+from telegram_click.registry import CommandRegistry
+from tests import TestBase, MockContext, RecordingErrorHandler, create_update
+
+
+class _RecordingPermission(Permission):
+    """
+    Permission that records its evaluations, like a permission requiring a network request would
+    """
+
+    def __init__(self, result: bool):
+        self.result = result
+        self.evaluations = 0
+
+    async def evaluate(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        self.evaluations += 1
+        return self.result
+
+
+class _FakeTimer:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CommandPipelineTest(TestBase):
+
+    def setUp(self):
+        self.context = MockContext(Application.builder().token("123:abc").build())
+        self.error_handler = RecordingErrorHandler()
+        self.registry = CommandRegistry()
+        self.calls = []
+
+    def _create_command(self, **kwargs) -> callable:
+        @command(name="pipeline_test", description="Test", error_handler=self.error_handler,
+                 arguments=[Argument(name="value", description="value", type=int, example="1", optional=True)],
+                 registry=self.registry, **kwargs)
+        async def callback(update, context, value: int):
+            self.calls.append(value)
+
+        return callback
+
+    def _call(self, callback: callable, text: str):
+        asyncio.run(callback(create_update(text), self.context))
+
+    def test_target_before_permissions(self):
+        permission = _RecordingPermission(True)
+        callback = self._create_command(permissions=permission)
+
+        self._call(callback, "/pipeline_test@otherbot 1")
+        self.assertEqual(permission.evaluations, 0)
+        self.assertEqual(callback.pipeline.dropped[Stage.TARGET], 1)
+
+        self._call(callback, "/pipeline_test@mybot 2")
+        self.assertEqual(permission.evaluations, 1)
+        self.assertEqual(self.calls, [2])
+
+    def test_permission_denied(self):
+        permission = _RecordingPermission(False)
+        callback = self._create_command(permissions=permission)
+
+        self._call(callback, "/pipeline_test 1")
+        self.assertEqual(self.calls, [])
+        self.assertEqual(self.error_handler.errors, [("permission", permission)])
+        self.assertEqual(callback.pipeline.dropped, {
+            Stage.TARGET: 0,
+            Stage.LENGTH: 0,
+            Stage.RATE_LIMIT: 0,
+            Stage.PERMISSIONS: 1,
+            Stage.PARSE: 0,
+        })
+
+    def test_length_before_permissions(self):
+        permission = _RecordingPermission(True)
+        callback = self._create_command(permissions=permission, parse_limits=ParseLimits(max_length=3))
+
+        self._call(callback, "/pipeline_test 12345")
+        self.assertEqual(permission.evaluations, 0)
+        self.assertEqual(callback.pipeline.dropped[Stage.LENGTH], 1)
+        self.assertEqual(self.error_handler.errors[0][0], "validation")
+
+    def test_rate_limit(self):
+        timer = _FakeTimer()
+        rate_limit = RateLimit(2, per=10, timer=timer)
+        callback = self._create_command(rate_limit=rate_limit)
+
+        for value in range(3):
+            self._call(callback, "/pipeline_test {}".format(value))
+        self.assertEqual(self.calls, [0, 1])
+        self.assertEqual(self.error_handler.errors, [("rate_limit", rate_limit)])
+        self.assertEqual(callback.pipeline.dropped[Stage.RATE_LIMIT], 1)
+
+        # one token is refilled every 5 seconds
+        timer.now = 5
+        self._call(callback, "/pipeline_test 3")
+        self._call(callback, "/pipeline_test 4")
+        self.assertEqual(self.calls, [0, 1, 3])
+
+    def test_parse_error(self):
+        callback = self._create_command()
+
+        self._call(callback, "/pipeline_test abc")
+        self.assertEqual(self.calls, [])
+        self.assertEqual(callback.pipeline.dropped[Stage.PARSE], 1)
+
+    def test_custom_order(self):
+        permission = _RecordingPermission(True)
+        callback = self._create_command(permissions=permission, stages=[Stage.PERMISSIONS, Stage.PARSE])
+
+        # the target is not checked at all
+        self._call(callback, "/pipeline_test@otherbot 1")
+        self.assertEqual(permission.evaluations, 1)
+        self.assertEqual(self.calls, [1])
+        self.assertEqual(list(callback.pipeline.dropped.keys()), [Stage.PERMISSIONS, Stage.PARSE])
+
+    def test_unused_stages_skipped(self):
+        callback = self._create_command()
+        self.assertEqual(callback.pipeline.active_stages, [Stage.TARGET, Stage.LENGTH, Stage.PARSE])
+        self.assertEqual(list(callback.pipeline.dropped.keys()), DEFAULT_STAGES)
+
+        self.registry.clear()
+        callback = self._create_command(command_target=CommandTarget.ANY, permissions=_RecordingPermission(True),
+                                        parse_limits=ParseLimits(max_tokens=10))
+        self.assertEqual(callback.pipeline.active_stages, [Stage.PERMISSIONS, Stage.PARSE])
+
+    def test_default_length_limit(self):
+        permission = _RecordingPermission(True)
+        callback = self._create_command(permissions=permission)
+
+        # the default limits are set after the command has been created
+        default_limits = parser.DEFAULT_PARSE_LIMITS
+        parser.DEFAULT_PARSE_LIMITS = ParseLimits(max_length=3)
+        try:
+            self._call(callback, "/pipeline_test 12345")
+        finally:
+            parser.DEFAULT_PARSE_LIMITS = default_limits
+
+        self.assertEqual(permission.evaluations, 0)
+        self.assertEqual(callback.pipeline.dropped[Stage.LENGTH], 1)
+
+    def test_without_arguments(self):
+        @command(name="pipeline_test_empty", description="Test", error_handler=self.error_handler,
+                 registry=self.registry)
+        async def callback(update, context):
+            self.calls.append("empty")
+
+        self._call(callback, "/pipeline_test_empty")
+        self.assertEqual(self.calls, ["empty"])
+
+        # excess text is still passed to the parser
+        self._call(callback, "/pipeline_test_empty abc")
+        self.assertEqual(self.calls, ["empty", "empty"])
+        self.assertEqual(self.error_handler.errors, [])
+
+    def test_method_callback(self):
+        calls = self.calls
+        registry = self.registry
+
+        class Bot:
+            @command(name="pipeline_test_method", description="Test", registry=registry,
+                     arguments=[Argument(name="value", description="value", type=int, example="1")])
+            async def callback(self, update, context, value: int):
+                calls.append((self, value))
+
+        bot = Bot()
+        self._call(bot.callback, "/pipeline_test_method 3")
+        self.assertEqual(self.calls, [(bot, 3)])
+
+    def test_invalid_stages(self):
+        self.assertRaises(ValueError, lambda: self._create_command(stages=["unknown", Stage.PARSE]))
+        self.assertRaises(ValueError, lambda: self._create_command(stages=[Stage.PARSE, Stage.PARSE]))
+        self.assertRaises(ValueError, lambda: self._create_command(stages=[Stage.TARGET]))
+
+
+class RateLimitTest(TestBase):
+
+    def test_per_user(self):
+        timer = _FakeTimer()
+        rate_limit = RateLimit(1, per=60, key=lambda x: x.effective_message.text, timer=timer)
+
+        self.assertTrue(rate_limit.try_acquire(create_update("a")))
+        self.assertFalse(rate_limit.try_acquire(create_update("a")))
+        self.assertTrue(rate_limit.try_acquire(create_update("b")))
+
+        timer.now = 60
+        self.assertTrue(rate_limit.try_acquire(create_update("a")))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, lambda: RateLimit(0))
+        self.assertRaises(ValueError, lambda: RateLimit(1, per=0))
@@ -0,0 +1,97 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+from telegram_click import COMMAND_LIST
+from telegram_click.const import KEY_NAMES
+from telegram_click.decorator import command
+from telegram_click.registry import CommandRegistry
+from tests import TestBase
+
+
+def _entry(*names: str) -> dict:
+    return {KEY_NAMES: list(names)}
+
+
+class CommandRegistryTest(TestBase):
+
+    def test_register(self):
+        registry = CommandRegistry()
+        first = registry.register(_entry("start", "s"))
+        second = registry.register(_entry("help"))
+
+        self.assertEqual(len(registry), 2)
+        self.assertEqual(list(registry), [first, second])
+        self.assertIs(registry.get("s"), first)
+        self.assertIn("help", registry)
+        self.assertNotIn("stop", registry)
+
+    def test_name_clash(self):
+        registry = CommandRegistry()
+        registry.register(_entry("start", "s"))
+
+        self.assertRaises(ValueError, lambda: registry.register(_entry("stop", "s")))
+        self.assertRaises(ValueError, lambda: registry.register(_entry("stop", "stop")))
+        # names are compared case-insensitively
+        self.assertRaises(ValueError, lambda: registry.register(_entry("START")))
+        self.assertRaises(ValueError, lambda: registry.register(_entry("stop", "Stop")))
+        self.assertNotIn("stop", registry)
+
+    def test_unregister(self):
+        registry = CommandRegistry()
+        entry = registry.register(_entry("start", "s"))
+
+        self.assertIs(registry.unregister("s"), entry)
+        self.assertIsNone(registry.unregister("start"))
+        self.assertEqual(len(registry), 0)
+        registry.register(_entry("start"))
+
+    def test_replace(self):
+        registry = CommandRegistry()
+        first = registry.register(_entry("start", "s"))
+        second = registry.register(_entry("help", "h"))
+
+        replacement = _entry("start", "h")
+        self.assertEqual(registry.replace(replacement), [first, second])
+        self.assertEqual(list(registry), [replacement])
+        self.assertIsNone(registry.get("s"))
+
+    def test_decorator_registry(self):
+        registry = CommandRegistry()
+
+        @command(name="registry_test", description="Test", registry=registry)
+        async def first(update, context):
+            pass
+
+        self.assertIn("registry_test", registry)
+        self.assertNotIn("registry_test", COMMAND_LIST)
+
+        # independent registries may use the same names
+        other = CommandRegistry()
+
+        @command(name="registry_test", description="Test", registry=other)
+        async def second(update, context):
+            pass
+
+        self.assertIn("registry_test", other)
+
+        with self.assertRaises(ValueError):
+            @command(name="registry_test", description="Test", registry=registry)
+            async def third(update, context):
+                pass
@@ -0,0 +1,120 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+import asyncio
+
+from telegram.ext import Application, MessageHandler
+
+from telegram_click.argument import Argument
+from telegram_click.decorator import command
+from telegram_click.registry import CommandRegistry
+from telegram_click.router import CommandRouter
+from tests import TestBase, MockContext, RecordingErrorHandler, create_update
+
+
+class CommandRouterTest(TestBase):
+
+    def setUp(self):
+        self.context = MockContext(Application.builder().token("123:abc").build())
+        self.error_handler = RecordingErrorHandler()
+        self.calls = []
+
+        @command(name=["router_test_start", "rts"], description="Start", error_handler=self.error_handler)
+        async def start(update, context):
+            self.calls.append(("start",))
+
+        @command(name="router_test_age", description="Set age", error_handler=self.error_handler,
+                 arguments=[Argument(name="age", description="age", type=int, example="1")])
+        async def age(update, context, age: int):
+            self.calls.append(("age", age))
+
+        async def unknown(update, context):
+            self.calls.append(("unknown", update.effective_message.text))
+
+        self.router = CommandRouter([start, age], unknown_command_callback=unknown)
+
+    def tearDown(self):
+        from telegram_click import COMMAND_LIST
+        COMMAND_LIST.unregister("router_test_start")
+        COMMAND_LIST.unregister("router_test_age")
+
+    def _route(self, text: str):
+        asyncio.run(self.router.route(create_update(text), self.context))
+
+    def test_route(self):
+        self._route("/router_test_start")
+        self._route("/RTS@mybot")
+        self._route("/router_test_age 3")
+        self._route("/router_test_age x")
+        self.assertEqual(self.calls, [("start",), ("start",), ("age", 3)])
+        self.assertEqual(self.error_handler.errors[0][0], "validation")
+
+    def test_unknown_command(self):
+        self._route("/router_test_unknown 1")
+        # commands of other bots are ignored
+        self._route("/router_test_unknown@otherbot")
+        self.assertEqual(self.calls, [("unknown", "/router_test_unknown 1")])
+
+    def test_command_list(self):
+        # module level functions are taken from the command list by default
+        router = CommandRouter()
+        self.assertIn("rts", router._routes)
+        self.assertRaises(ValueError, router.add, lambda update, context: None)
+        self.assertRaises(ValueError, router.add, lambda update, context: None, ["rts"])
+        self.assertIsInstance(router.create_handler(), MessageHandler)
+
+    def test_methods(self):
+        registry = CommandRegistry()
+        calls = self.calls
+
+        class Bot:
+            @command(name="router_test_method", description="Method", registry=registry)
+            async def method(self, update, context):
+                calls.append(("method", self))
+
+        @command(name="router_test_function", description="Function", registry=registry)
+        async def function(update, context):
+            calls.append(("function",))
+
+        # methods in the registry are skipped, they have to be passed as bound methods
+        router = CommandRouter(registry=registry)
+        self.assertEqual(set(router._routes.keys()), {"router_test_function"})
+        self.assertRaises(ValueError, router.add, Bot.method)
+
+        bot = Bot()
+        router.add(bot.method)
+        asyncio.run(router.route(create_update("/router_test_method"), self.context))
+        self.assertEqual(self.calls, [("method", bot)])
+
+    def test_case_insensitive_names(self):
+        registry = CommandRegistry()
+
+        @command(name="router_test_case", description="Test", registry=registry)
+        async def lower(update, context):
+            pass
+
+        with self.assertRaises(ValueError):
+            @command(name="Router_Test_Case", description="Test", registry=registry)
+            async def upper(update, context):
+                pass
+
+        self.assertIn("ROUTER_TEST_CASE", registry)
+        router = CommandRouter(registry=registry)
+        self.assertIn("router_test_case", router._routes)
@@ -0,0 +1,49 @@
+#  Copyright (c) 2020 Markus Ressel
+#  .
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+
+from telegram_click.util import PrefixTrie
+from tests import TestBase
+
+
+class PrefixTrieTest(TestBase):
+
+    def test_unique_prefix(self):
+        trie = PrefixTrie([("verbose", 0), ("version", 1), ("description", 2), ("desc", 2)])
+
+        self.assertEqual(trie.get_unique("verbo"), 0)
+        self.assertEqual(trie.get_unique("vers"), 1)
+        # aliases of the same value are not ambiguous
+        self.assertEqual(trie.get_unique("de"), 2)
+        self.assertIsNone(trie.get_unique("ver"))
+        self.assertIsNone(trie.get_unique("x"))
+        self.assertEqual(trie.get_unique("x", -1), -1)
+
+    def test_exact_match(self):
+        trie = PrefixTrie([("verb", 0), ("verbose", 1)])
+
+        self.assertEqual(trie.get_unique("verb"), 0)
+        self.assertIsNone(trie.get_unique("ver"))
+
+    def test_keys_with_prefix(self):
+        trie = PrefixTrie([("verbose", 0), ("version", 1), ("description", 2)])
+
+        self.assertEqual(trie.keys_with_prefix("ver"), ["verbose", "version"])
+        self.assertEqual(trie.keys_with_prefix(""), ["description", "verbose", "version"])
+        self.assertEqual(trie.keys_with_prefix("x"), [])